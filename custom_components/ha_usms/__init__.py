@@ -10,13 +10,18 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from homeassistant.const import Platform
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
 
 from .const import DOMAIN, LOGGER
-from .coordinator import HAUSMSDataUpdateCoordinator
+from .coordinator import HAUSMSDataUpdateCoordinator, get_update_interval
 from .data import HAUSMSRuntimeData
+from .integrity import INTEGRITY_CHECK_INTERVAL
+from .services import async_setup_services
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import HAUSMSConfigEntry
 
@@ -25,6 +30,17 @@ PLATFORMS: list[Platform] = [
     Platform.SENSOR,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(
+    hass: HomeAssistant,
+    config: ConfigType,  # noqa: ARG001
+) -> bool:
+    """Set up the HA-USMS services."""
+    async_setup_services(hass)
+    return True
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
@@ -42,6 +58,16 @@ async def async_setup_entry(
     await coordinator.async_config_entry_first_refresh()
 
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    entry.async_on_unload(coordinator.profiler.disarm)
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.async_check_integrity,
+            INTEGRITY_CHECK_INTERVAL,
+            name=f"{DOMAIN} statistics integrity check",
+            cancel_on_shutdown=True,
+        )
+    )
 
     entry.runtime_data = HAUSMSRuntimeData(coordinator)
 
@@ -59,8 +85,15 @@ async def async_unload_entry(
 
 
 async def _async_update_listener(
-    hass: HomeAssistant,
+    hass: HomeAssistant,  # noqa: ARG001
     entry: HAUSMSConfigEntry,
 ) -> None:
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """
+    Handle config entry update.
+
+    Options are applied to the running coordinator as they are, the reconfigure flow
+    reloads the entry itself when its credentials change.
+    """
+    await entry.runtime_data.coordinator.async_set_update_interval(
+        get_update_interval(entry)
+    )
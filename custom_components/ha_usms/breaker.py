@@ -0,0 +1,171 @@
+"""Circuit breaker for requests to the USMS portal."""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN, LOGGER
+
+
+class HAUSMSBreakerState(StrEnum):
+    """States of the circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class HAUSMSFailureKind(StrEnum):
+    """Kinds of portal failures, each with its own backoff policy."""
+
+    AUTH = "auth"
+    TIMEOUT = "timeout"
+    SERVER = "server"
+
+
+@dataclass(frozen=True)
+class HAUSMSBackoffPolicy:
+    """When to open the breaker for a kind of failure, and for how long."""
+
+    # consecutive failures of this kind before the breaker opens
+    threshold: int
+    # first backoff delay in seconds, doubled every time the breaker opens again
+    base_delay: float
+    max_delay: float
+
+
+BACKOFF_POLICIES = {
+    # wrong credentials won't fix themselves, so don't keep hammering the login page
+    HAUSMSFailureKind.AUTH: HAUSMSBackoffPolicy(1, 15 * 60, 6 * 60 * 60),
+    # every timed out request holds a connection for up to a minute
+    HAUSMSFailureKind.TIMEOUT: HAUSMSBackoffPolicy(2, 5 * 60, 2 * 60 * 60),
+    HAUSMSFailureKind.SERVER: HAUSMSBackoffPolicy(3, 60, 60 * 60),
+}
+# seconds until another probe is let through, if the last one never reported back,
+# like when it was cancelled, the same as the client's timeout
+PROBE_TIMEOUT = 60
+
+
+class HAUSMSCircuitOpenError(HomeAssistantError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+    def __init__(self, retry_in: float) -> None:
+        """Initialize the error."""
+        super().__init__(
+            translation_domain=DOMAIN,
+            translation_key="circuit_open",
+            translation_placeholders={"retry_in": str(round(retry_in))},
+        )
+        self.retry_in = retry_in
+
+
+class HAUSMSCircuitBreaker:
+    """
+    Stop sending requests to the portal for a while after repeated failures.
+
+    Closed, requests go through and failures are counted per kind. Once a kind reaches
+    its threshold, the breaker opens and requests fail fast for a jittered, growing
+    delay. After that it is half-open: only the next request is let through as a probe,
+    and the others fail fast until it closes the breaker again on success, or re-opens
+    it on failure.
+    """
+
+    def __init__(
+        self,
+        policies: dict[HAUSMSFailureKind, HAUSMSBackoffPolicy] | None = None,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self.policies = policies or BACKOFF_POLICIES
+
+        self.state = HAUSMSBreakerState.CLOSED
+        self.failures = dict.fromkeys(self.policies, 0)
+        self.last_failure: HAUSMSFailureKind | None = None
+        self.opens = 0
+        self.opened_at: float | None = None
+        self.retry_at: float | None = None
+        self.probe_started: float | None = None
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds left until the breaker lets a probe through."""
+        if self.retry_at is None:
+            return 0.0
+        return max(self.retry_at - time.monotonic(), 0.0)
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if requests are being held back right now."""
+        return self.state is HAUSMSBreakerState.OPEN and self.retry_in > 0
+
+    def before_request(self) -> None:
+        """Raise HAUSMSCircuitOpenError if requests are not allowed right now."""
+        if self.state is HAUSMSBreakerState.OPEN:
+            if self.is_open:
+                raise HAUSMSCircuitOpenError(self.retry_in)
+            self.state = HAUSMSBreakerState.HALF_OPEN
+            LOGGER.debug("Circuit breaker is half-open, probing the USMS portal")
+        elif self.state is HAUSMSBreakerState.HALF_OPEN:
+            probe_age = time.monotonic() - (self.probe_started or 0.0)
+            if probe_age < PROBE_TIMEOUT:
+                raise HAUSMSCircuitOpenError(PROBE_TIMEOUT - probe_age)
+            LOGGER.debug("Probe of the USMS portal never finished, probing again")
+        else:
+            return
+        self.probe_started = time.monotonic()
+
+    def record_success(self) -> None:
+        """Record a successful request, closing the breaker."""
+        if self.state is not HAUSMSBreakerState.CLOSED:
+            LOGGER.info("USMS portal is reachable again, resuming requests")
+        self.state = HAUSMSBreakerState.CLOSED
+        self.failures = dict.fromkeys(self.policies, 0)
+        self.opens = 0
+        self.opened_at = self.retry_at = self.probe_started = None
+
+    def record_failure(self, kind: HAUSMSFailureKind) -> None:
+        """Record a failed request, opening the breaker if needed."""
+        self.failures[kind] += 1
+        self.last_failure = kind
+
+        policy = self.policies[kind]
+        if self.state is HAUSMSBreakerState.OPEN:
+            return
+        if (
+            self.state is HAUSMSBreakerState.HALF_OPEN
+            or self.failures[kind] >= policy.threshold
+        ):
+            self._open(kind, policy)
+
+    def _open(self, kind: HAUSMSFailureKind, policy: HAUSMSBackoffPolicy) -> None:
+        """Open the breaker, with a jittered exponential backoff delay."""
+        delay = min(policy.base_delay * 2**self.opens, policy.max_delay)
+        # equal jitter: keep at least half of the delay, so retries stay spread out
+        delay = delay / 2 + random.uniform(0, delay / 2)  # noqa: S311
+
+        self.state = HAUSMSBreakerState.OPEN
+        self.probe_started = None
+        self.opens += 1
+        self.opened_at = time.monotonic()
+        self.retry_at = self.opened_at + delay
+        LOGGER.warning(
+            "Pausing requests to the USMS portal for %ds after %d %s failures",
+            delay,
+            self.failures[kind],
+            kind,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker's state as a dict, for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": dict(self.failures),
+            "last_failure": self.last_failure,
+            "opens": self.opens,
+            "retry_in": round(self.retry_in, 1),
+        }
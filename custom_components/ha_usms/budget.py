@@ -0,0 +1,49 @@
+"""Time budget of a single HA-USMS poll."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+# the parts of a meter's data that are fetched separately, each with its own freshness
+FIELD_BALANCE = "balance"
+FIELD_STATISTICS = "statistics"
+FIELD_THIS_MONTH = "this_month"
+FIELD_LAST_MONTH = "last_month"
+
+
+class HAUSMSPollBudget:
+    """
+    Deadline shared by all the optional work of a poll.
+
+    Every optional request only gets the time left until the deadline, so one slow
+    meter or day can't hold up the whole poll, and the work left over once it runs out
+    can be finished later. Without any seconds given, there is no deadline.
+    """
+
+    def __init__(self, seconds: float | None = None) -> None:
+        """Start the budget."""
+        self.deadline = time.monotonic() + seconds if seconds is not None else None
+
+    @property
+    def remaining(self) -> float | None:
+        """Return the seconds left in the budget, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Return True if the budget has run out."""
+        return self.deadline is not None and self.remaining <= 0
+
+    async def async_run[T](self, job: Callable[[], Awaitable[T]]) -> T:
+        """Run a job within the remaining budget, raising TimeoutError if it can't."""
+        if self.expired:
+            raise TimeoutError
+        async with asyncio.timeout(self.remaining):
+            return await job()
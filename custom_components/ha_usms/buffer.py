@@ -0,0 +1,149 @@
+"""Rolling hourly consumption buffer for HA-USMS."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .epoch import (
+    SECONDS_PER_HOUR,
+    hour_to_datetime,
+    hour_to_day_start,
+    to_epoch_hours,
+)
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    import pandas as pd
+
+DEFAULT_BUFFER_DAYS = 30
+ROLLING_WINDOW_DAYS = (7, 30)
+
+
+class HAUSMSConsumptionBuffer:
+    """
+    Ring buffer of a meter's last few days of hourly consumptions.
+
+    Slots are addressed by hours since the epoch, so writing any hour within the buffer
+    is O(1), and so is keeping the rolling window sums up to date, which are adjusted
+    by each write instead of being summed up again.
+    """
+
+    def __init__(self, days: int = DEFAULT_BUFFER_DAYS) -> None:
+        """Initialize an empty buffer."""
+        self.capacity = days * 24
+        self.windows = {
+            window_days: window_days * 24
+            for window_days in ROLLING_WINDOW_DAYS
+            if window_days <= days
+        }
+
+        self._values = np.zeros(self.capacity)
+        self._known = np.zeros(self.capacity, dtype=bool)
+        self._last_hour: int | None = None
+
+        self._sums = dict.fromkeys(self.windows, 0.0)
+        self._counts = dict.fromkeys(self.windows, 0)
+        self._today_start = 0
+        self._today_sum = 0.0
+
+    def __len__(self) -> int:
+        """Return the number of hours with a known consumption."""
+        return int(self._known.sum())
+
+    @property
+    def last_hour(self) -> datetime | None:
+        """Return the start of the latest hour in the buffer."""
+        if self._last_hour is None:
+            return None
+        return hour_to_datetime(self._last_hour)
+
+    def update(self, consumptions: pd.Series) -> None:
+        """Write the given hourly consumptions, skipping any older than the buffer."""
+        consumptions = consumptions.dropna()
+        hours = to_epoch_hours(consumptions.index)
+        for hour, value in zip(hours.tolist(), consumptions.tolist(), strict=True):
+            self.set(hour, value)
+
+    def set(self, hour: int, value: float) -> None:
+        """Write the consumption of a single hour, given in hours since the epoch."""
+        if self._last_hour is None or hour > self._last_hour:
+            self._advance(hour)
+        elif hour <= self._last_hour - self.capacity:
+            return
+
+        slot = hour % self.capacity
+        delta = value - self._values[slot]
+        was_known = self._known[slot]
+        self._values[slot] = value
+        self._known[slot] = True
+
+        for window_days, window in self.windows.items():
+            if hour > self._last_hour - window:
+                self._sums[window_days] += delta
+                self._counts[window_days] += int(not was_known)
+        if hour >= self._today_start:
+            self._today_sum += delta
+
+    def _advance(self, hour: int) -> None:
+        """Move the head of the buffer forward to the given hour."""
+        if self._last_hour is None or hour - self._last_hour >= self.capacity:
+            self._values[:] = 0
+            self._known[:] = False
+            self._sums = dict.fromkeys(self.windows, 0.0)
+            self._counts = dict.fromkeys(self.windows, 0)
+        else:
+            for next_hour in range(self._last_hour + 1, hour + 1):
+                # drop the hours falling out of each window
+                for window_days, window in self.windows.items():
+                    slot = (next_hour - window) % self.capacity
+                    self._sums[window_days] -= self._values[slot]
+                    self._counts[window_days] -= int(self._known[slot])
+                slot = next_hour % self.capacity
+                self._values[slot] = 0
+                self._known[slot] = False
+
+        today_start = hour_to_day_start(hour)
+        if today_start != self._today_start:
+            self._today_start = today_start
+            self._today_sum = 0.0
+        self._last_hour = hour
+
+    @property
+    def today(self) -> float | None:
+        """
+        Return the consumption so far today, as of the latest hour.
+
+        Until the first hour of today is known, nothing has been consumed today yet,
+        rather than the latest hour's day still being today.
+        """
+        if self._last_hour is None:
+            return None
+        current_hour = int(time.time()) // SECONDS_PER_HOUR
+        if self._today_start != hour_to_day_start(current_hour):
+            return 0.0
+        return round(self._today_sum, 3)
+
+    def rolling_sum(self, days: int) -> float | None:
+        """Return the consumption within the last given days."""
+        if self._last_hour is None or days not in self.windows:
+            return None
+        return round(self._sums[days], 3)
+
+    def average_daily(self, days: int) -> float | None:
+        """Return the average daily consumption over the known hours of the window."""
+        if self._last_hour is None or days not in self.windows:
+            return None
+        if self._counts[days] == 0:
+            return None
+        return round(self._sums[days] / self._counts[days] * 24, 3)
+
+    def days_remaining(self, remaining_unit: float, days: int) -> float | None:
+        """Return how many days the remaining units last at the average daily use."""
+        average_daily = self.average_daily(days)
+        if not average_daily or average_daily <= 0:
+            return None
+        return round(remaining_unit / average_daily, 1)
@@ -0,0 +1,79 @@
+"""USMS client for HA-USMS."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from usms import USMSClient
+from usms.exceptions.errors import USMSLoginError
+
+from .breaker import HAUSMSCircuitBreaker, HAUSMSFailureKind
+
+if TYPE_CHECKING:
+    from usms.core.protocols import HTTPXResponseProtocol
+
+
+class HAUSMSClient(USMSClient):
+    """
+    USMSClient that keeps count of the requests and logins it makes.
+
+    All requests go through a circuit breaker, which stops sending requests for a while
+    once the portal keeps failing.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the client and its counters."""
+        super().__init__(*args, **kwargs)
+
+        self.requests = 0
+        self.logins = 0
+        self.login_duration = 0.0
+
+        self.breaker = HAUSMSCircuitBreaker()
+
+    async def _request_async(
+        self,
+        http_method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> HTTPXResponseProtocol:
+        """Send a request to the portal, counting it and guarding it by the breaker."""
+        self.breaker.before_request()
+
+        self.requests += 1
+        try:
+            response = await super()._request_async(http_method, url, **kwargs)
+        except httpx.TimeoutException:
+            self.breaker.record_failure(HAUSMSFailureKind.TIMEOUT)
+            raise
+        except httpx.TransportError:
+            self.breaker.record_failure(HAUSMSFailureKind.SERVER)
+            raise
+
+        # usms would try to parse an error page, fail early instead
+        if (
+            response.status_code == httpx.codes.TOO_MANY_REQUESTS
+            or response.status_code >= httpx.codes.INTERNAL_SERVER_ERROR
+        ):
+            self.breaker.record_failure(HAUSMSFailureKind.SERVER)
+            response.raise_for_status()
+
+        self.breaker.record_success()
+        return response
+
+    async def _authenticate_async(self) -> HTTPXResponseProtocol:
+        """Log in to the portal, counting and timing it."""
+        self.logins += 1
+        started = time.perf_counter()
+        try:
+            return await super()._authenticate_async()
+        except USMSLoginError:
+            self.breaker.record_failure(HAUSMSFailureKind.AUTH)
+            raise
+        except httpx.TimeoutException:
+            self.breaker.record_failure(HAUSMSFailureKind.TIMEOUT)
+            raise
+        finally:
+            self.login_duration += time.perf_counter() - started
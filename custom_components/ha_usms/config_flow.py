@@ -8,10 +8,10 @@ from homeassistant.const import CONF_PASSWORD, CONF_SCAN_INTERVAL, CONF_USERNAME
 from homeassistant.core import callback
 from homeassistant.helpers import selector
 from slugify import slugify
-from usms import AsyncUSMSAccount
 from usms.exceptions.errors import USMSLoginError
 
 from .const import DEFAULT_SCAN_INTERVAL, DOMAIN, LOGGER, MIN_SCAN_INTERVAL
+from .login import async_login
 
 
 class HAUSMSFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -70,8 +70,8 @@ class HAUSMSFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def _test_credentials(self, username: str, password: str) -> None:
-        """Validate credentials."""
-        await AsyncUSMSAccount.create(username, password)
+        """Validate credentials, keeping the login for the entry's setup."""
+        await async_login(self.hass, username, password)
 
     async def async_step_reconfigure(
         self,
@@ -93,9 +93,16 @@ class HAUSMSFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                     unique_id=slugify(user_input[CONF_USERNAME], separator="_")
                 )
                 self._abort_if_unique_id_mismatch()
+                entry = self._get_reconfigure_entry()
+                # new credentials take logging in and discovering the meters again,
+                # and an entry that failed to set up, like on wrong credentials,
+                # is retried even with the same ones
                 return self.async_update_reload_and_abort(
-                    self._get_reconfigure_entry(),
+                    entry,
                     data_updates=user_input,
+                    reload_even_if_entry_is_unchanged=(
+                        entry.state is not config_entries.ConfigEntryState.LOADED
+                    ),
                 )
 
         return self.async_show_form(
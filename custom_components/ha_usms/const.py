@@ -9,3 +9,6 @@ ATTRIBUTION = "Data fetched from https://www.usms.com.bn/"
 
 DEFAULT_SCAN_INTERVAL = 60 * 60
 MIN_SCAN_INTERVAL = 10 * 60
+
+# seconds a poll may spend on anything but the balances, well within the client timeout
+POLL_BUDGET = 30
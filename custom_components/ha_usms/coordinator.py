@@ -3,33 +3,82 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
+import pandas as pd
 import tzdata  # needed to avoid blocking  # noqa: F401
 from homeassistant.const import CONF_PASSWORD, CONF_SCAN_INTERVAL, CONF_USERNAME
 from homeassistant.exceptions import ConfigEntryAuthFailed
-from homeassistant.helpers.httpx_client import get_async_client
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from usms import AsyncUSMSAccount, USMSClient
+from usms import BRUNEI_TZ
 from usms.exceptions.errors import USMSLoginError
+from usms.utils.helpers import new_consumptions_dataframe
 
-from .const import DEFAULT_SCAN_INTERVAL, LOGGER
+from .budget import (
+    FIELD_BALANCE,
+    FIELD_LAST_MONTH,
+    FIELD_STATISTICS,
+    FIELD_THIS_MONTH,
+    HAUSMSPollBudget,
+)
+from .buffer import HAUSMSConsumptionBuffer
+from .const import DEFAULT_SCAN_INTERVAL, DOMAIN, LOGGER, POLL_BUDGET
 from .data import HAUSMSMeterData
+from .digests import HAUSMSDayDigests
 from .helpers import (
     consumptions_series_to_dataframe,
     dataframe_diff,
     dataframe_to_statistics,
+    get_days_to_fetch,
     get_missing_days,
     get_sensor_statistics,
     statistics_to_dataframe,
 )
+from .integrity import HAUSMSIntegrityChecker
+from .login import create_account, pop_login
+from .metrics import HAUSMSMetrics
+from .months import (
+    DAY_FETCH_REQUESTS,
+    MONTH_FETCH_REQUESTS,
+    HAUSMSMonthTotals,
+    get_last_month,
+    get_month_days,
+)
+from .profiler import HAUSMSProfiler
+from .statistics import async_get_new_cost_statistics, date_to_datetime
 
 if TYPE_CHECKING:
+    import asyncio
+    from datetime import date
     from logging import Logger
 
     from homeassistant.core import HomeAssistant
+    from usms import AsyncUSMSMeter
 
+    from .client import HAUSMSClient
     from .data import HAUSMSConfigEntry
+    from .metrics import HAUSMSActionMetrics
+
+
+def get_credentials(config_entry: HAUSMSConfigEntry) -> tuple[str, str]:
+    """Return the username and password of a config entry."""
+    return config_entry.data[CONF_USERNAME], config_entry.data[CONF_PASSWORD]
+
+
+def get_update_interval(config_entry: HAUSMSConfigEntry) -> timedelta:
+    """Return the poll interval set in a config entry's options."""
+    return timedelta(
+        seconds=config_entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    )
+
+
+def _clear_new_statistics(meters: list[HAUSMSMeterData]) -> None:
+    """Clear the meters' new statistics, once the sensors have imported them."""
+    for meter_data in meters:
+        meter_data.new_statistics = []
+        meter_data.new_cost_statistics = []
+        meter_data.new_hourly_consumptions = None
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
@@ -51,173 +100,489 @@ class HAUSMSDataUpdateCoordinator(DataUpdateCoordinator):
             logger,
             name=name,
             config_entry=config_entry,
-            update_interval=timedelta(
-                seconds=config_entry.options.get(
-                    CONF_SCAN_INTERVAL,
-                    DEFAULT_SCAN_INTERVAL,
-                )
-            ),
+            update_interval=get_update_interval(config_entry),
         )
 
-        async_client = get_async_client(hass)
-        async_client.timeout = 60
-
-        username = config_entry.data[CONF_USERNAME]
-        password = config_entry.data[CONF_PASSWORD]
+        # the client logs in with these for the coordinator's lifetime, changing them
+        # takes a reload
+        self.credentials = get_credentials(config_entry)
+        # right after the config flow, its login and account are used as they are
+        account = pop_login(hass, *self.credentials)
+        self._account_initialized = account is not None
+        self.account = account or create_account(hass, *self.credentials)
+        usms_client: HAUSMSClient = self.account.session
+        self.profiler = HAUSMSProfiler(hass)
+        self.metrics = HAUSMSMetrics(usms_client, self.profiler)
+        self.breaker = usms_client.breaker
+        self.integrity = HAUSMSIntegrityChecker(hass, config_entry)
+        self.digests = HAUSMSDayDigests(hass, config_entry)
+        self.months = HAUSMSMonthTotals(hass, config_entry)
+        # rolling hourly consumptions of each meter, by meter no
+        self.buffers: dict[str, HAUSMSConsumptionBuffer] = {}
+        # fields of each meter put off by a poll, by meter no, and the background task
+        # finishing them
+        self._deferred: dict[str, set[str]] = {}
+        self._deferred_task: asyncio.Task | None = None
+        # the poll or deferred work whose new statistics the sensors import next
+        self.import_action: HAUSMSActionMetrics | None = None
 
-        usms_client = USMSClient(
-            client=async_client,
-            username=username,
-            password=password,
+    async def async_set_update_interval(self, update_interval: timedelta) -> None:
+        """Change the poll interval of the running coordinator."""
+        if update_interval == self.update_interval:
+            return
+        LOGGER.debug(
+            "Changing the poll interval of USMS account %s from %s to %s",
+            self.config_entry.title,
+            self.update_interval,
+            update_interval,
         )
-        self.account = AsyncUSMSAccount(session=usms_client)
+        self.update_interval = update_interval
+        # the poll scheduled with the old interval makes way for one now, which
+        # schedules the next with the new interval, and costs no requests if the
+        # account isn't due for an update
+        await self.async_request_refresh()
 
     async def _async_setup(self) -> None:
         """Set up the coordinator."""
-        await self.account.initialize()
+        with (
+            self.metrics.action("setup") as action,
+            action.phase("account_refresh"),
+        ):
+            if not self._account_initialized:
+                await self.account.initialize()
+        await self.integrity.async_load()
+        await self.digests.async_load()
+        await self.months.async_load()
 
-    async def _async_update_data(self) -> Any:  # noqa: PLR0912, PLR0915
+    async def async_check_integrity(self, *_: Any) -> None:
+        """Check the statistics of every meter recorded since the last check."""
+        if self.data is None:
+            return
+        with self.metrics.action("check_statistics") as action:
+            for meter_data in self.data:
+                await self.integrity.async_check(action, meter_data)
+
+    async def _async_update_data(self) -> Any:
         """Update data via library."""
+        # while the portal keeps failing, don't even try, and keep the last good data
+        if self.breaker.is_open and self.data is not None:
+            LOGGER.debug(
+                "Skipping poll, requests to the USMS portal are paused for %ds",
+                self.breaker.retry_in,
+            )
+            return self._get_last_data()
+
+        # let the work put off by the last poll finish first, rather than race it
+        if self._deferred_task is not None:
+            deferred_task, self._deferred_task = self._deferred_task, None
+            await deferred_task
+
         try:
-            has_updates = self.account.is_update_due()
+            with self.metrics.action("poll") as action:
+                self.import_action = action
+                return await self._async_poll(action)
+        except USMSLoginError as exception:
+            LOGGER.error(exception)
+            raise ConfigEntryAuthFailed(exception) from exception
+        except Exception as exception:
+            if self.breaker.is_open and self.data is not None:
+                # the breaker has already warned about it
+                LOGGER.debug("Poll failed, keeping the last data: %s", exception)
+                return self._get_last_data()
+            LOGGER.error(exception)
+            raise UpdateFailed(exception) from exception
+
+    def _get_last_data(self) -> list[HAUSMSMeterData]:
+        """Return the last good data, without its already imported statistics."""
+        _clear_new_statistics(self.data)
+        return self.data
+
+    async def _async_poll(
+        self,
+        action: HAUSMSActionMetrics,
+    ) -> list[HAUSMSMeterData]:
+        """
+        Poll the account and its meters for updates.
+
+        The balances come first, with the account refresh. Everything else is optional,
+        and only fetched while the poll's budget lasts. Whatever is left over is
+        finished in the background, keeping the previous values, and when they were
+        last fetched, in the meantime.
+        """
+        budget = HAUSMSPollBudget(POLL_BUDGET)
+
+        has_updates = self.account.is_update_due()
+        if not has_updates:
+            LOGGER.debug(
+                "USMS account %s is not due for an update", self.account.reg_no
+            )
+        else:
+            LOGGER.debug("USMS account %s is due for an update", self.account.reg_no)
+
+            with action.phase("account_refresh"):
+                has_updates = await self.account.refresh_data()
             if not has_updates:
-                LOGGER.debug(
-                    f"USMS account {self.account.reg_no} is not due for an update"
-                )
+                LOGGER.debug("USMS account %s has no new updates", self.account.reg_no)
             else:
-                LOGGER.debug(f"USMS account {self.account.reg_no} is due for an update")
+                LOGGER.debug("USMS account %s has new updates", self.account.reg_no)
 
-                has_updates = await self.account.refresh_data()
-                if not has_updates:
-                    LOGGER.debug(
-                        f"USMS account {self.account.reg_no} has no new updates"
-                    )
-                else:
-                    LOGGER.debug(f"USMS account {self.account.reg_no} has new updates")
-
-            is_first_run = self.data is None
-            now = datetime.now().astimezone()
-
-            # check for updates for every meter
-            meters = []
-            for meter in self.account.meters:
-                meter_data = HAUSMSMeterData.from_meter(meter)
-
-                meter_data.last_refresh = self.account.last_refresh
-                meter_data.next_refresh = now + self.update_interval
-
-                # only check on first run or
-                # only re-check if its still within the first 3 days of a new month and
-                # there has been any updates
-                if is_first_run or (
-                    now.day < 3 and has_updates  # noqa: PLR2004
-                ):
-                    # get last month's total consumption and cost
-                    LOGGER.debug(
-                        f"Fetching last month's consumptions for {meter_data.name}"
-                    )
-                    last_month_consumptions = (
-                        await meter.get_previous_n_month_consumptions(n=1)
-                    )
-                    meter_data.last_month_total_consumption = (
-                        meter.calculate_total_consumption(last_month_consumptions)
-                    )
-                    meter_data.last_month_total_cost = meter.calculate_total_cost(
-                        last_month_consumptions
-                    )
-                # just use the data from the last run
-                else:
-                    prev_meter_data = self.get_meter_data_by_no(meter_data.no)
-                    meter_data.last_month_total_consumption = (
-                        prev_meter_data.last_month_total_consumption
-                    )
-                    meter_data.last_month_total_cost = (
-                        prev_meter_data.last_month_total_cost
-                    )
+        is_first_run = self.data is None
+        now = datetime.now(tz=BRUNEI_TZ)
 
-                # only check on first run or
-                # only re-check if there has been any updates
-                if is_first_run or has_updates:
-                    # get this month's total consumption and cost
-                    LOGGER.debug(
-                        f"Fetching this month's consumptions for {meter_data.name}"
-                    )
-                    this_month_consumptions = (
-                        await meter.get_previous_n_month_consumptions(n=0)
-                    )
-                    meter_data.this_month_total_consumption = (
-                        meter.calculate_total_consumption(this_month_consumptions)
-                    )
-                    meter_data.this_month_total_cost = meter.calculate_total_cost(
-                        this_month_consumptions
-                    )
-                # just use the data from the last run
-                else:
-                    prev_meter_data = self.get_meter_data_by_no(meter_data.no)
-                    meter_data.this_month_total_consumption = (
-                        prev_meter_data.this_month_total_consumption
-                    )
-                    meter_data.this_month_total_cost = (
-                        prev_meter_data.this_month_total_cost
-                    )
+        # the balances are in, hand them out right away with the last known rest
+        meters = []
+        for meter in self.account.meters:
+            meter_data = HAUSMSMeterData.from_meter(meter)
+            prev_meter_data = (
+                None if is_first_run else self.get_meter_data_by_no(meter_data.no)
+            )
 
-                meter_data.new_statistics = []
-                # only check if not on first run, and there has been any updates
-                if not is_first_run and has_updates:
-                    # get last 2 days of hourly consumptions
-                    LOGGER.debug(
-                        f"Fetching the last 2 days' consumptions for {meter_data.name}"
-                    )
-                    new_hourly_consumptions = (
-                        await meter.get_last_n_days_hourly_consumptions(n=2)
+            meter_data.last_refresh = self.account.last_refresh
+            meter_data.next_refresh = now + self.update_interval
+            meter_data.updated = (
+                dict(prev_meter_data.updated) if prev_meter_data else {}
+            )
+            meter_data.updated[FIELD_BALANCE] = self.account.last_refresh
+
+            for field in (FIELD_LAST_MONTH, FIELD_THIS_MONTH):
+                setattr(
+                    meter_data,
+                    f"{field}_total_consumption",
+                    getattr(prev_meter_data, f"{field}_total_consumption", None),
+                )
+                setattr(
+                    meter_data,
+                    f"{field}_total_cost",
+                    getattr(prev_meter_data, f"{field}_total_cost", None),
+                )
+            meter_data.new_statistics = []
+            meter_data.new_cost_statistics = []
+            meter_data.new_hourly_consumptions = None
+            meters.append(meter_data)
+
+        for meter, meter_data in zip(self.account.meters, meters, strict=True):
+            deferred = self._deferred.pop(meter_data.no, set())
+
+            # only check on first run or
+            # only re-check if there has been any updates, and some of last month's
+            # days haven't been seen since they ended, or may have been revised
+            if (
+                is_first_run
+                or (
+                    has_updates
+                    and self.months.get_days_to_check(
+                        meter_data, get_last_month(now.date().replace(day=1))
                     )
+                )
+                or FIELD_LAST_MONTH in deferred
+            ):
+                # get last month's total consumption and cost
+                await self._async_poll_month(
+                    action, budget, meter, meter_data, FIELD_LAST_MONTH
+                )
 
-                    # get meter's old statistics
-                    old_statistics = await get_sensor_statistics(
-                        self.hass,
-                        f"sensor.{meter_data.unique_id}",
+            # only check on first run or
+            # only re-check if there has been any updates
+            if is_first_run or has_updates or FIELD_THIS_MONTH in deferred:
+                # get this month's total consumption and cost
+                await self._async_poll_month(
+                    action, budget, meter, meter_data, FIELD_THIS_MONTH
+                )
+
+            # only check if not on first run, and there has been any updates
+            if not is_first_run and (has_updates or FIELD_STATISTICS in deferred):
+                await self._async_poll_statistics(action, budget, meter, meter_data)
+
+            meter_data.deferred = sorted(self._deferred.get(meter_data.no, set()))
+            LOGGER.debug("Finished fetching updates for %s", meter_data.name)
+
+        if self._deferred:
+            self._deferred_task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_run_deferred(meters),
+                name=f"{DOMAIN} deferred poll work",
+            )
+        return meters
+
+    def _defer(self, meter_data: HAUSMSMeterData, field: str) -> None:
+        """Put off fetching a field of a meter until after the poll."""
+        LOGGER.debug("Out of poll budget, deferring %s of %s", field, meter_data.name)
+        self._deferred.setdefault(meter_data.no, set()).add(field)
+
+    async def _async_run_deferred(self, meters: list[HAUSMSMeterData]) -> None:
+        """Finish the deferred work, logging any failure instead of raising it."""
+        try:
+            await self._async_finish_deferred(meters)
+        except Exception:  # noqa: BLE001
+            # the poll's own data stands, and the next poll starts afresh
+            LOGGER.exception("Failed to finish the work deferred by the last poll")
+
+    async def _async_finish_deferred(self, meters: list[HAUSMSMeterData]) -> None:
+        """
+        Fetch the fields put off by the last poll, without a deadline.
+
+        The poll's own data is handed out meanwhile, and the rest as soon as it is in.
+        The next poll waits for this to finish, so the poll's data is still current.
+        """
+        deferred, self._deferred = self._deferred, {}
+        # the sensors imported the poll's new statistics as soon as it returned, so
+        # only the ones fetched here are handed out again
+        _clear_new_statistics(meters)
+        budget = HAUSMSPollBudget()
+        updated_meters = {}
+        with self.metrics.action("deferred") as action:
+            for meter_no, fields in deferred.items():
+                meter = self.account.get_meter(meter_no)
+                meter_data = HAUSMSMeterData.from_meter(
+                    next(
+                        meter_data for meter_data in meters if meter_data.no == meter_no
                     )
-                    old_statistics_df = statistics_to_dataframe(old_statistics)
-
-                    # Try to find gaps in data
-                    if old_statistics != []:
-                        # Fetch statistics for each missing day
-                        for date in await get_missing_days(statistics=old_statistics):
-                            day_statistics = await meter.fetch_hourly_consumptions(date)
-                            new_hourly_consumptions = day_statistics.combine_first(
-                                new_hourly_consumptions
+                )
+                meter_data.updated = dict(meter_data.updated)
+                for field in sorted(fields):
+                    try:
+                        if field == FIELD_STATISTICS:
+                            await self._async_poll_statistics(
+                                action, budget, meter, meter_data
                             )
+                        else:
+                            await self._async_poll_month(
+                                action, budget, meter, meter_data, field
+                            )
+                    except Exception as exception:  # noqa: BLE001
+                        # try again with the next poll
+                        LOGGER.warning(
+                            "Failed to fetch the deferred %s of %s: %s",
+                            field,
+                            meter_data.name,
+                            exception,
+                        )
+                        self._defer(meter_data, field)
+                meter_data.deferred = sorted(self._deferred.get(meter_no, set()))
+                updated_meters[meter_no] = meter_data
 
-                    new_hourly_consumptions_df = consumptions_series_to_dataframe(
-                        new_hourly_consumptions
-                    )
+            self.data = [
+                updated_meters.get(meter_data.no, meter_data) for meter_data in meters
+            ]
+            # the sensors import the new statistics into this action, not the poll's
+            self.import_action = action
+            self.async_update_listeners()
+        # the sensors have imported any new statistics by now
+        self._get_last_data()
 
-                    # combine new_hourly_consumptions_df into old_statistics_df
-                    temp_statistics_df = old_statistics_df.combine_first(
-                        new_hourly_consumptions_df
-                    )
-                    # calculate cumulative sum for the state column
-                    temp_statistics_df["sum"] = temp_statistics_df["state"].cumsum()
+    async def _async_poll_month(
+        self,
+        action: HAUSMSActionMetrics,
+        budget: HAUSMSPollBudget,
+        meter: AsyncUSMSMeter,
+        meter_data: HAUSMSMeterData,
+        field: str,
+    ) -> None:
+        """Fetch the total consumption and cost of the meter's last or this month."""
+        today = datetime.now(tz=BRUNEI_TZ).date()
+        this_month = today.replace(day=1)
+        try:
+            if field == FIELD_THIS_MONTH:
+                consumptions = await self._async_fetch_month(
+                    action, budget, meter, meter_data, 0
+                )
+                # kept for when this month becomes last month
+                self.months.update(
+                    meter_data, this_month, consumptions, range(1, today.day + 1)
+                )
+            else:
+                consumptions = await self._async_get_last_month(
+                    action, budget, meter, meter_data, this_month
+                )
+        except TimeoutError:
+            self._defer(meter_data, field)
+            return
+
+        setattr(
+            meter_data,
+            f"{field}_total_consumption",
+            meter.calculate_total_consumption(consumptions),
+        )
+        setattr(
+            meter_data,
+            f"{field}_total_cost",
+            meter.calculate_total_cost(consumptions),
+        )
+        meter_data.updated[field] = datetime.now().astimezone()
+
+    async def _async_fetch_month(
+        self,
+        action: HAUSMSActionMetrics,
+        budget: HAUSMSPollBudget,
+        meter: AsyncUSMSMeter,
+        meter_data: HAUSMSMeterData,
+        n: int,
+    ) -> pd.Series:
+        """Fetch the daily consumptions of the meter's nth previous month."""
+        LOGGER.debug("Fetching %d months ago's consumptions for %s", n, meter_data.name)
+        with action.phase("month_fetch") as phase:
+            consumptions = await budget.async_run(
+                partial(meter.get_previous_n_month_consumptions, n=n)
+            )
+            phase.rows += len(consumptions)
+        return consumptions
 
-                    # get new statistics only
-                    new_statistics_df = dataframe_diff(
-                        old_statistics_df, temp_statistics_df
+    async def _async_get_last_month(
+        self,
+        action: HAUSMSActionMetrics,
+        budget: HAUSMSPollBudget,
+        meter: AsyncUSMSMeter,
+        meter_data: HAUSMSMeterData,
+        this_month: date,
+    ) -> pd.Series:
+        """
+        Return the daily consumptions of the meter's last month.
+
+        Last month was seen while it was this month, so only the days not seen since
+        they ended, and the final days the portal may still revise, are fetched. Unless
+        there are too many of them, when fetching the whole month takes fewer requests.
+        """
+        last_month = get_last_month(this_month)
+        days = self.months.get_days_to_check(meter_data, last_month)
+        if len(days) * DAY_FETCH_REQUESTS > MONTH_FETCH_REQUESTS:
+            consumptions = await self._async_fetch_month(
+                action, budget, meter, meter_data, 1
+            )
+            self.months.update(
+                meter_data,
+                last_month,
+                consumptions,
+                range(1, get_month_days(last_month) + 1),
+            )
+            return consumptions
+
+        for day in days:
+            with action.phase("day_fetch") as phase:
+                day_consumptions = await budget.async_run(
+                    partial(
+                        meter.fetch_hourly_consumptions,
+                        date_to_datetime(last_month.replace(day=day)),
                     )
-                    # convert statistics df to statistics list
-                    meter_data.new_statistics = dataframe_to_statistics(
-                        new_statistics_df
+                )
+                phase.rows += len(day_consumptions)
+            totals = {}
+            if not day_consumptions.dropna().empty:
+                totals[day] = meter.calculate_total_consumption(day_consumptions)
+            # recorded as fetched even without consumptions, so it isn't fetched again
+            self.months.update(
+                meter_data, last_month, pd.Series(totals, dtype=float), [day]
+            )
+        return self.months.get(meter_data, last_month)
+
+    async def _async_poll_statistics(
+        self,
+        action: HAUSMSActionMetrics,
+        budget: HAUSMSPollBudget,
+        meter: AsyncUSMSMeter,
+        meter_data: HAUSMSMeterData,
+    ) -> None:
+        """Fetch the meter's new hourly consumptions, as statistics to import."""
+        # get meter's old statistics
+        with action.phase("recorder_read") as phase:
+            old_statistics = await get_sensor_statistics(
+                self.hass,
+                f"sensor.{meter_data.unique_id}",
+            )
+            phase.rows += len(old_statistics)
+        with action.phase("transform"):
+            old_statistics_df = statistics_to_dataframe(old_statistics)
+            # nothing recorded, so nothing can be skipped as already imported
+            if old_statistics == []:
+                self.digests.reset(meter_data)
+
+            # only fetch the days from the last stored statistic up until
+            # the meter's last update, usually just today's partial day
+            days = get_days_to_fetch(
+                old_statistics[-1]["start"] if old_statistics else None,
+                meter.last_update,
+            )
+            # Try to find gaps in data, filled in only after catching up
+            if old_statistics != []:
+                missing_days = await get_missing_days(statistics=old_statistics)
+                # days the recorder lost hours of since they were imported
+                self.digests.forget(meter_data, missing_days)
+                catch_up_days = {day.date() for day in days}
+                days += [day for day in missing_days if day.date() not in catch_up_days]
+
+        # Fetch statistics for each day
+        LOGGER.debug(
+            "Fetching %d days' consumptions for %s", len(days), meter_data.name
+        )
+        new_hourly_consumptions = new_consumptions_dataframe(meter.unit, "h")[
+            meter.unit
+        ]
+        for day in days:
+            with action.phase("day_fetch") as phase:
+                try:
+                    day_statistics = await budget.async_run(
+                        partial(meter.fetch_hourly_consumptions, day)
                     )
+                except TimeoutError:
+                    self._defer(meter_data, FIELD_STATISTICS)
+                    break
+                phase.rows += len(day_statistics)
+            new_hourly_consumptions = day_statistics.combine_first(
+                new_hourly_consumptions
+            )
+        else:
+            meter_data.updated[FIELD_STATISTICS] = datetime.now().astimezone()
 
-                meters.append(meter_data)
-                LOGGER.debug(f"Finished fetching updates for {meter_data.name}")
+        with action.phase("digest"):
+            # drop the days that haven't changed since they were imported
+            new_hourly_consumptions = self.digests.filter_changed(
+                meter_data, new_hourly_consumptions
+            )
 
-            return meters  # noqa: TRY300
-        except USMSLoginError as exception:
-            LOGGER.error(exception)
-            raise ConfigEntryAuthFailed(exception) from exception
-        except Exception as exception:
-            LOGGER.error(exception)
-            raise UpdateFailed(exception) from exception
+        if new_hourly_consumptions.empty:
+            temp_statistics_df = old_statistics_df
+            new_statistics_df = old_statistics_df.iloc[:0]
+        else:
+            with action.phase("transform") as phase:
+                new_hourly_consumptions_df = consumptions_series_to_dataframe(
+                    new_hourly_consumptions
+                )
+
+                # combine new_hourly_consumptions_df into old_statistics_df
+                temp_statistics_df = old_statistics_df.combine_first(
+                    new_hourly_consumptions_df
+                )
+                # calculate cumulative sum for the state column
+                temp_statistics_df["sum"] = temp_statistics_df["state"].cumsum()
+
+                # get new statistics only
+                new_statistics_df = dataframe_diff(
+                    old_statistics_df, temp_statistics_df
+                )
+                # convert statistics df to statistics list
+                meter_data.new_statistics = dataframe_to_statistics(new_statistics_df)
+                phase.rows += len(meter_data.new_statistics)
+            # only remembered once the sensor has imported them, right after this poll
+            meter_data.new_hourly_consumptions = new_hourly_consumptions
+
+        # keep the rolling buffer up to date with the new consumptions, or
+        # fill it up from the recorded ones the first time
+        buffer = self.buffers.setdefault(meter_data.no, HAUSMSConsumptionBuffer())
+        with action.phase("buffer"):
+            if len(buffer) == 0:
+                buffer.update(temp_statistics_df["state"].iloc[-buffer.capacity :])
+            else:
+                buffer.update(new_statistics_df["state"])
+
+        # update the cost statistics of the months of the new consumptions, only if
+        # there are any new ones
+        if meter_data.new_statistics != []:
+            meter_data.new_cost_statistics = await async_get_new_cost_statistics(
+                self,
+                action,
+                meter_data,
+                temp_statistics_df,
+                new_statistics_df.index.min().to_pydatetime(),
+            )
 
     def get_meter_data_by_no(self, meter_no: str) -> HAUSMSMeterData | None:
         """Return meter data by meter no."""
@@ -0,0 +1,70 @@
+"""Tiered tariff cost calculation for HA-USMS."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from usms import TARIFFS
+
+from .epoch import to_epoch_months
+from .helpers import cumulative_sum
+
+if TYPE_CHECKING:
+    from usms.models.tariff import USMSTariff
+
+
+def get_tariff(meter_type: str) -> USMSTariff | None:
+    """Return the tariff for a given meter type, the same way usms looks it up."""
+    tariff = None
+    for tariff_type, type_tariff in TARIFFS.items():
+        if tariff_type.upper() in meter_type.upper():
+            tariff = type_tariff
+    return tariff
+
+
+def calculate_hourly_costs(consumptions: pd.Series, tariff: USMSTariff) -> pd.Series:
+    """
+    Return the cost of each hourly consumption, according to a tiered tariff.
+
+    Tiers apply to the cumulative consumption within each calendar month, so an hour's
+    cost is the difference between the month's running cost after and before it. This
+    is done in one pass over the whole series, without looping over hours or months.
+    """
+    if consumptions.empty:
+        return pd.Series(dtype=float, index=consumptions.index, name="state")
+
+    # tier bounds the same way USMSTariff.calculate_cost counts them
+    sizes = np.array(
+        [tier.upper_bound - tier.lower_bound + 1 for tier in tariff.tiers],
+        dtype=float,
+    )
+    rates = np.array([tier.rate for tier in tariff.tiers], dtype=float)
+    lower = np.concatenate(([0.0], np.cumsum(sizes)[:-1]))
+
+    values = np.nan_to_num(consumptions.to_numpy(dtype=float, na_value=np.nan))
+    months = to_epoch_months(consumptions.index)
+    month_totals = pd.Series(values).groupby(months).cumsum().to_numpy()
+
+    # running cost within the month: each tier charges the part of the running
+    # consumption that falls within it
+    month_costs = np.clip(month_totals[:, None] - lower, 0, sizes) @ rates
+
+    costs = np.diff(month_costs, prepend=0.0)
+    # the first hour of each month starts a new running cost
+    new_month = np.concatenate(([True], months[1:] != months[:-1]))
+    costs[new_month] = month_costs[new_month]
+
+    return pd.Series(costs, index=consumptions.index, name="state")
+
+
+def costs_to_statistics_dataframe(
+    costs: pd.Series,
+    initial_sum: float = 0.0,
+) -> pd.DataFrame:
+    """Return hourly costs as a statistics DataFrame, with a running sum."""
+    costs_df = costs.to_frame("state")
+    costs_df.index.name = "start"
+    costs_df["sum"] = cumulative_sum(costs_df["state"], initial_sum)
+    return costs_df
@@ -8,9 +8,12 @@ from typing import TYPE_CHECKING, Self
 from slugify import slugify
 from usms import AsyncUSMSMeter
 
+from .const import DOMAIN
+
 if TYPE_CHECKING:
     from datetime import datetime
 
+    import pandas as pd
     from homeassistant.components.recorder.models.statistics import StatisticMetaData
     from homeassistant.config_entries import ConfigEntry
 
@@ -41,6 +44,13 @@ class HAUSMSMeterData(AsyncUSMSMeter):
     this_month_total_cost: float
 
     new_statistics: list
+    new_cost_statistics: list
+    # the consumptions behind the new statistics, for the day digests once imported
+    new_hourly_consumptions: pd.Series | None
+
+    # when each separately fetched field was last fetched, and which were put off
+    updated: dict[str, datetime]
+    deferred: list[str]
 
     currency: str = "BND"
 
@@ -81,3 +91,20 @@ class HAUSMSMeterData(AsyncUSMSMeter):
             "statistic_id": self.statistic_id,
             "unit_of_measurement": self.unit,
         }
+
+    @property
+    def cost_statistic_id(self) -> str:
+        """Return the statistic_id for the companion cost statistic of this meter."""
+        return f"{DOMAIN}:{self.unique_id}_cost"
+
+    @property
+    def cost_metadata(self) -> StatisticMetaData:
+        """Return a StatisticMetaData for the companion cost statistic of this meter."""
+        return {
+            "has_mean": False,
+            "has_sum": True,
+            "name": f"{self.name} Cost",
+            "source": DOMAIN,
+            "statistic_id": self.cost_statistic_id,
+            "unit_of_measurement": self.currency,
+        }
@@ -0,0 +1,49 @@
+"""Diagnostics support for HA-USMS."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import HAUSMSConfigEntry
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,  # noqa: ARG001
+    entry: HAUSMSConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data.coordinator
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "meters": [
+            {
+                "type": meter_data.type,
+                "unit": meter_data.unit,
+                "last_update": meter_data.last_update.isoformat(),
+                "last_refresh": meter_data.last_refresh.isoformat(),
+                "new_statistics": len(meter_data.new_statistics),
+                "updated": {
+                    field: updated.isoformat()
+                    for field, updated in meter_data.updated.items()
+                },
+                "deferred": meter_data.deferred,
+            }
+            for meter_data in coordinator.data or []
+        ],
+        "breaker": coordinator.breaker.as_dict(),
+        "integrity": coordinator.integrity.as_dict(),
+        "digests": coordinator.digests.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+    }
@@ -0,0 +1,128 @@
+"""Per-day digests of HA-USMS meters' imported hourly consumptions."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+import numpy as np
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .epoch import (
+    datetime_to_epoch_day,
+    epoch_day_to_date,
+    to_epoch_days,
+    to_hours_of_day,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import datetime
+
+    import pandas as pd
+    from homeassistant.core import HomeAssistant
+
+    from .data import HAUSMSConfigEntry, HAUSMSMeterData
+
+DIGESTS_STORAGE_VERSION = 1
+# portal consumptions have 3 decimals at most, rounding keeps float noise out
+DIGEST_DECIMALS = 3
+DIGEST_SIZE = 8
+
+
+def get_day_digests(consumptions: pd.Series) -> dict[int, str]:
+    """
+    Return a digest of the 24 hourly consumptions of each day, by epoch day.
+
+    Missing hours are hashed as NaN, so a day that later fills in gets a new digest.
+    """
+    consumptions = consumptions.dropna()
+    if consumptions.empty:
+        return {}
+
+    days, day_positions = np.unique(
+        to_epoch_days(consumptions.index), return_inverse=True
+    )
+    values = np.full((len(days), 24), np.nan)
+    values[day_positions, to_hours_of_day(consumptions.index)] = np.round(
+        consumptions.to_numpy(dtype=float), DIGEST_DECIMALS
+    )
+    return {
+        int(day): hashlib.blake2b(row.tobytes(), digest_size=DIGEST_SIZE).hexdigest()
+        for day, row in zip(days, values, strict=True)
+    }
+
+
+class HAUSMSDayDigests:
+    """
+    Index of the digests of every day imported into a meter's statistics.
+
+    Days fetched again can be checked against it in O(1), so whole days that haven't
+    changed upstream are dropped before they are merged, summed up and imported.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: HAUSMSConfigEntry) -> None:
+        """Initialize the index."""
+        self._store: Store[dict[str, dict[str, str]]] = Store(
+            hass,
+            DIGESTS_STORAGE_VERSION,
+            f"{DOMAIN}.{config_entry.entry_id}.digests",
+        )
+        self._meters: dict[str, dict[str, str]] = {}
+
+    async def async_load(self) -> None:
+        """Load the digests of the previous imports."""
+        self._meters = await self._store.async_load() or {}
+
+    def filter_changed(
+        self,
+        meter_data: HAUSMSMeterData,
+        consumptions: pd.Series,
+    ) -> pd.Series:
+        """Return only the consumptions of days that changed since their last import."""
+        digests = self._meters.get(meter_data.statistic_id, {})
+        changed_days = [
+            day
+            for day, digest in get_day_digests(consumptions).items()
+            if digests.get(epoch_day_to_date(day).isoformat()) != digest
+        ]
+        consumptions = consumptions.dropna()
+        return consumptions[np.isin(to_epoch_days(consumptions.index), changed_days)]
+
+    def update(self, meter_data: HAUSMSMeterData, consumptions: pd.Series) -> None:
+        """Remember the digests of the days of imported consumptions."""
+        day_digests = get_day_digests(consumptions)
+        if not day_digests:
+            return
+        self._meters.setdefault(meter_data.statistic_id, {}).update(
+            {
+                epoch_day_to_date(day).isoformat(): digest
+                for day, digest in day_digests.items()
+            }
+        )
+        self._store.async_delay_save(lambda: self._meters)
+
+    def forget(self, meter_data: HAUSMSMeterData, days: Iterable[datetime]) -> None:
+        """
+        Forget the digests of days, so they get imported again even if unchanged.
+
+        A digest only tells what was imported, not what the recorder still has, so the
+        days found with missing hours must be forgotten before they can be filled in.
+        """
+        digests = self._meters.get(meter_data.statistic_id, {})
+        forgotten = [
+            digests.pop(epoch_day_to_date(datetime_to_epoch_day(day)).isoformat(), None)
+            for day in days
+        ]
+        if any(digest is not None for digest in forgotten):
+            self._store.async_delay_save(lambda: self._meters)
+
+    def reset(self, meter_data: HAUSMSMeterData) -> None:
+        """Forget a meter's digests, so every day gets imported again."""
+        self._meters.pop(meter_data.statistic_id, None)
+        self._store.async_delay_save(lambda: self._meters)
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the number of days indexed for each meter, for diagnostics."""
+        return {statistic_id: len(days) for statistic_id, days in self._meters.items()}
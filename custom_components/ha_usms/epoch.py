@@ -0,0 +1,87 @@
+"""
+Integer epoch buckets of hours, days and months in Brunei time.
+
+Brunei keeps UTC+8 all year round, without DST, so its local hours, days and months
+are just offset epoch seconds. Bucketing a whole history is then plain integer array
+arithmetic, instead of converting every timestamp between timezones, and never
+depends on the timezone of the machine Home Assistant runs on.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+from usms import BRUNEI_TZ
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
+BRUNEI_UTC_OFFSET = 8 * SECONDS_PER_HOUR
+# the epoch day of 1970-01-01, to convert epoch days from and to dates
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def to_epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the seconds since the epoch of every timestamp of a DatetimeIndex."""
+    return index.as_unit("s").asi8
+
+
+def to_epoch_hours(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the hour since the epoch of every timestamp of a DatetimeIndex."""
+    return to_epoch_seconds(index) // SECONDS_PER_HOUR
+
+
+def to_epoch_days(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the Brunei day since the epoch of every timestamp of a DatetimeIndex."""
+    return (to_epoch_seconds(index) + BRUNEI_UTC_OFFSET) // SECONDS_PER_DAY
+
+
+def to_hours_of_day(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the Brunei hour of the day, 0 to 23, of every timestamp."""
+    return (
+        (to_epoch_seconds(index) + BRUNEI_UTC_OFFSET)
+        % SECONDS_PER_DAY
+        // (SECONDS_PER_HOUR)
+    )
+
+
+def to_epoch_months(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return the Brunei calendar month since the epoch of every timestamp."""
+    local_seconds = to_epoch_seconds(index) + BRUNEI_UTC_OFFSET
+    return local_seconds.astype("datetime64[s]").astype("datetime64[M]").astype(int)
+
+
+def hour_to_day_start(hour: int) -> int:
+    """Return the first hour of the Brunei day of a given hour since the epoch."""
+    return hour - (hour + BRUNEI_UTC_OFFSET // SECONDS_PER_HOUR) % 24
+
+
+def hour_to_datetime(hour: int) -> datetime:
+    """Return the start of a given hour since the epoch, in Brunei time."""
+    return datetime.fromtimestamp(hour * SECONDS_PER_HOUR, tz=BRUNEI_TZ)
+
+
+def datetime_to_epoch_day(moment: datetime) -> int:
+    """Return the Brunei day since the epoch of a given timezone-aware datetime."""
+    return (int(moment.timestamp()) + BRUNEI_UTC_OFFSET) // SECONDS_PER_DAY
+
+
+def date_to_epoch_day(day: date) -> int:
+    """Return the Brunei day since the epoch of a given date."""
+    return day.toordinal() - EPOCH_ORDINAL
+
+
+def epoch_day_to_date(day: int) -> date:
+    """Return the date of a given Brunei day since the epoch."""
+    return date.fromordinal(EPOCH_ORDINAL + day)
+
+
+def epoch_day_to_datetime(day: int) -> datetime:
+    """Return the start of a given Brunei day since the epoch, in Brunei time."""
+    return datetime.fromtimestamp(
+        day * SECONDS_PER_DAY - BRUNEI_UTC_OFFSET, tz=BRUNEI_TZ
+    )
@@ -1,27 +1,40 @@
 # ruff: noqa: RET504
 """Helper functions for HA-USMS."""
 
-from datetime import datetime, timedelta
+from collections.abc import AsyncIterator
+from datetime import datetime, time, timedelta
 
+import numpy as np
 import pandas as pd
-from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.components.recorder.db_schema import Statistics
+from homeassistant.components.recorder.statistics import (
+    get_metadata,
+    statistics_during_period,
+)
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.recorder import get_instance
+from homeassistant.helpers.recorder import get_instance, session_scope
+from sqlalchemy import func
 from usms import BRUNEI_TZ
 
 from .const import LOGGER
+from .epoch import datetime_to_epoch_day, epoch_day_to_datetime, to_epoch_days
 
 
-async def get_sensor_statistics(hass: HomeAssistant, statistic_id: str) -> list:
-    """Return the sensor statistics for a given statistic_id."""
+async def get_sensor_statistics(
+    hass: HomeAssistant,
+    statistic_id: str,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+) -> list:
+    """Return the sensor statistics for a given statistic_id, optionally a window."""
     LOGGER.debug(
-        f"Retrieving statistics from recorder for statistic_id: {statistic_id}"
+        "Retrieving statistics from recorder for statistic_id: %s", statistic_id
     )
     statistics = await get_instance(hass).async_add_executor_job(
         statistics_during_period,
         hass,
-        datetime.fromtimestamp(0).astimezone(),
-        None,
+        start_time or datetime.fromtimestamp(0).astimezone(),
+        end_time,
         [statistic_id],
         "hour",
         None,
@@ -30,13 +43,112 @@ async def get_sensor_statistics(hass: HomeAssistant, statistic_id: str) -> list:
     statistics = statistics.get(statistic_id, [])
     if statistics != []:
         LOGGER.debug(
-            f"Retrieved statistics from recorder for statistic_id: {statistic_id}"
+            "Retrieved statistics from recorder for statistic_id: %s", statistic_id
         )
     else:
-        LOGGER.debug(f"No statistics recorded yet for statistic_id: {statistic_id}")
+        LOGGER.debug("No statistics recorded yet for statistic_id: %s", statistic_id)
     return statistics
 
 
+async def iter_sensor_statistics(
+    hass: HomeAssistant,
+    statistic_id: str,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+) -> AsyncIterator[tuple[datetime, datetime, list]]:
+    """
+    Yield the sensor statistics for a given statistic_id, a calendar month at a time.
+
+    Every month (in Brunei time) from the start, or the first recorded statistic, until
+    the end, or now, is yielded as (month_start, month_end, statistics), empty months
+    included. Only one month of statistics is held at a time, however long the history.
+    """
+    if start_time is None:
+        start_time = await get_first_statistic_start(hass, statistic_id)
+        if start_time is None:
+            return
+    end_time = end_time or datetime.now(tz=BRUNEI_TZ)
+
+    window_start = get_month_start(start_time)
+    while window_start < end_time:
+        window_end = get_month_start(window_start + timedelta(days=31))
+        statistics = await get_sensor_statistics(
+            hass,
+            statistic_id,
+            max(window_start, start_time),
+            min(window_end, end_time),
+        )
+        yield window_start, window_end, statistics
+        window_start = window_end
+
+
+async def get_first_statistic_start(
+    hass: HomeAssistant,
+    statistic_id: str,
+) -> datetime | None:
+    """Return the start of the first recorded statistic of a given statistic_id."""
+    first_start = await get_instance(hass).async_add_executor_job(
+        _get_first_statistic_start, hass, statistic_id
+    )
+    if first_start is None:
+        return None
+    return datetime.fromtimestamp(first_start, tz=BRUNEI_TZ)
+
+
+def _get_first_statistic_start(hass: HomeAssistant, statistic_id: str) -> float | None:
+    """Return the first start timestamp of a statistic_id, in the recorder's thread."""
+    metadata = get_metadata(hass, statistic_ids={statistic_id})
+    if statistic_id not in metadata:
+        return None
+    metadata_id = metadata[statistic_id][0]
+    with session_scope(hass=hass, read_only=True) as session:
+        return (
+            session.query(func.min(Statistics.start_ts))
+            .filter(Statistics.metadata_id == metadata_id)
+            .scalar()
+        )
+
+
+async def get_last_statistic_sum(
+    hass: HomeAssistant,
+    statistic_id: str,
+    before: datetime,
+) -> float | None:
+    """Return the sum of the last recorded statistic of a statistic_id before a time."""
+    return await get_instance(hass).async_add_executor_job(
+        _get_last_statistic_sum, hass, statistic_id, before.timestamp()
+    )
+
+
+def _get_last_statistic_sum(
+    hass: HomeAssistant,
+    statistic_id: str,
+    before: float,
+) -> float | None:
+    """Return the last sum of a statistic_id before a time, in the recorder's thread."""
+    metadata = get_metadata(hass, statistic_ids={statistic_id})
+    if statistic_id not in metadata:
+        return None
+    metadata_id = metadata[statistic_id][0]
+    with session_scope(hass=hass, read_only=True) as session:
+        return (
+            session.query(Statistics.sum)
+            .filter(
+                Statistics.metadata_id == metadata_id,
+                Statistics.start_ts < before,
+            )
+            .order_by(Statistics.start_ts.desc())
+            .limit(1)
+            .scalar()
+        )
+
+
+def get_month_start(moment: datetime) -> datetime:
+    """Return the start of the calendar month of a given moment, in Brunei time."""
+    moment = moment.astimezone(BRUNEI_TZ)
+    return datetime.combine(moment.date().replace(day=1), time(), tzinfo=BRUNEI_TZ)
+
+
 def consumptions_series_to_dataframe(consumptions: pd.Series) -> pd.DataFrame:
     """Return given consumptions pd.Series as DataFrame."""
     consumptions.index.name = "start"
@@ -70,6 +182,17 @@ def dataframe_to_statistics(dataframe: pd.DataFrame) -> list:
     return statistics
 
 
+def cumulative_sum(states: pd.Series, initial_sum: float = 0.0) -> pd.Series:
+    """
+    Return the running sum of the given states, carried on from an initial sum.
+
+    The initial sum is added first rather than to the result, so the sums come out
+    exactly the same as those of a cumsum over the whole history.
+    """
+    sums = pd.concat([pd.Series([initial_sum]), states.reset_index(drop=True)]).cumsum()
+    return pd.Series(sums.to_numpy()[1:], index=states.index, name="sum")
+
+
 def dataframe_diff(
     old_dataframe: pd.DataFrame,
     new_dataframe: pd.DataFrame,
@@ -81,6 +204,60 @@ def dataframe_diff(
     return new_dataframe
 
 
+def get_days_to_fetch(
+    last_statistic_start: float | datetime | None,
+    last_update: datetime,
+    default_days: int = 2,
+) -> list[datetime]:
+    """
+    Return the days to fetch to catch up from the last statistic to the last update.
+
+    Always includes the day of the last update, and only goes further back if the
+    stored statistics lag behind it. Without any stored statistics, return the last
+    `default_days` days up until the last update.
+    """
+    last_update = last_update.astimezone(BRUNEI_TZ)
+
+    if last_statistic_start is None:
+        first_day = last_update - timedelta(days=default_days)
+    else:
+        if not isinstance(last_statistic_start, datetime):
+            last_statistic_start = datetime.fromtimestamp(
+                last_statistic_start, tz=BRUNEI_TZ
+            )
+        # the first hour that has not been stored yet
+        first_day = last_statistic_start.astimezone(BRUNEI_TZ) + timedelta(hours=1)
+    first_day = min(first_day, last_update)
+
+    first_day = datetime.combine(first_day.date(), time(), tzinfo=BRUNEI_TZ)
+    return [
+        first_day + timedelta(days=i)
+        for i in range((last_update.date() - first_day.date()).days + 1)
+    ]
+
+
+def get_incomplete_days(
+    statistics_df: pd.DataFrame,
+    start: datetime,
+    end: datetime,
+) -> list[datetime]:
+    """
+    Return the days from start's until end with fewer than 24 hourly statistics.
+
+    The end is exclusive, and the days are counted as epoch days in Brunei time.
+    """
+    first_day = datetime_to_epoch_day(start)
+    day_count = max(datetime_to_epoch_day(end) - first_day, 0)
+    days = to_epoch_days(statistics_df.index) - first_day
+    rows_per_day = np.bincount(
+        days[(days >= 0) & (days < day_count)], minlength=day_count
+    )
+    return [
+        epoch_day_to_datetime(first_day + day)
+        for day in np.flatnonzero(rows_per_day < 24).tolist()  # noqa: PLR2004
+    ]
+
+
 async def get_missing_days(
     hass: HomeAssistant = None,
     statistic_id: str = "",
@@ -97,21 +274,10 @@ async def get_missing_days(
     if statistics == []:
         return []
 
-    statistics = statistics_to_dataframe(statistics)
-    # List of all days from min to yesterday
-    all_days = pd.date_range(
-        statistics.index.min().to_pydatetime().astimezone(),
-        datetime.now().astimezone() - timedelta(days=1),
-        freq="D",
+    statistics_df = statistics_to_dataframe(statistics)
+    # Find days missing or with incomplete data, from the first day until yesterday
+    return get_incomplete_days(
+        statistics_df,
+        statistics_df.index.min().to_pydatetime(),
+        epoch_day_to_datetime(datetime_to_epoch_day(datetime.now(tz=BRUNEI_TZ))),
     )
-    # Group by day and count rows
-    rows_per_day = statistics.groupby(statistics.index.normalize()).size()
-
-    # Find days missing or with incomplete data
-    missing_days = [
-        day.to_pydatetime()  # convert to python datetime object
-        for day in all_days
-        if day not in rows_per_day.index or rows_per_day.get(day, 0) < 24  # noqa: PLR2004
-    ]
-
-    return list(missing_days)
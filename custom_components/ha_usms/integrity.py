@@ -0,0 +1,293 @@
+"""Incremental integrity checks of HA-USMS statistics."""
+
+from __future__ import annotations
+
+import itertools
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+from homeassistant.helpers.storage import Store
+from usms import BRUNEI_TZ
+
+from .const import DOMAIN, LOGGER
+from .epoch import SECONDS_PER_HOUR, to_epoch_seconds
+from .helpers import (
+    get_first_statistic_start,
+    get_sensor_statistics,
+    statistics_to_dataframe,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import HAUSMSConfigEntry, HAUSMSMeterData
+    from .metrics import HAUSMSActionMetrics
+
+INTEGRITY_CHECK_INTERVAL = timedelta(hours=6)
+INTEGRITY_STORAGE_VERSION = 1
+INTEGRITY_WINDOW = timedelta(days=31)
+# windows checked per run, so a long unverified history is worked through over
+# several runs instead of in one go
+INTEGRITY_MAX_WINDOWS = 12
+# sums are floats, added up over years
+SUM_TOLERANCE = 1e-6
+
+DAMAGE_MISALIGNED = "misaligned"
+DAMAGE_DUPLICATE = "duplicate"
+DAMAGE_MISSING = "missing"
+DAMAGE_SUM = "sum"
+DAMAGE_STATE = "state"
+DAMAGE_KINDS = (
+    DAMAGE_MISALIGNED,
+    DAMAGE_DUPLICATE,
+    DAMAGE_MISSING,
+    DAMAGE_SUM,
+    DAMAGE_STATE,
+)
+
+
+def find_damaged_hours(
+    statistics_df: pd.DataFrame,
+    previous_start: datetime | None,
+    previous_sum: float | None,
+    consumptions: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    Return the damaged hours of a window of statistics, with a column per damage.
+
+    Each hour's sum must be the previous hour's sum plus its state, its start must be
+    on the hour and unique, no hours may be missing since the previous hour, and its
+    state must match the portal's consumption wherever one is given. The `range_start`
+    column holds where repairs need to start from, which is earlier for missing hours.
+    """
+    starts = to_epoch_seconds(statistics_df.index)
+    states = statistics_df["state"].to_numpy(dtype=float)
+    sums = statistics_df["sum"].to_numpy(dtype=float)
+
+    damaged = pd.DataFrame(index=statistics_df.index)
+    damaged[DAMAGE_MISALIGNED] = starts % SECONDS_PER_HOUR != 0
+    damaged[DAMAGE_DUPLICATE] = statistics_df.index.duplicated(keep=False)
+
+    previous_starts = np.concatenate(
+        (
+            [
+                previous_start.timestamp()
+                if previous_start
+                else starts[0] - SECONDS_PER_HOUR
+            ],
+            starts[:-1],
+        )
+    )
+    # an hour whose previous hour is missing ends a gap
+    damaged[DAMAGE_MISSING] = starts - previous_starts > SECONDS_PER_HOUR
+    damaged["range_start"] = np.where(
+        damaged[DAMAGE_MISSING], previous_starts + SECONDS_PER_HOUR, starts
+    ).astype(int)
+
+    previous_sums = np.concatenate(
+        ([previous_sum if previous_sum is not None else sums[0] - states[0]], sums[:-1])
+    )
+    damaged[DAMAGE_SUM] = ~np.isclose(
+        sums - previous_sums, states, rtol=0, atol=SUM_TOLERANCE
+    )
+
+    damaged[DAMAGE_STATE] = False
+    if consumptions is not None and not consumptions.empty:
+        consumptions = consumptions.reindex(statistics_df.index)
+        damaged[DAMAGE_STATE] = consumptions.notna().to_numpy() & ~np.isclose(
+            states, consumptions.to_numpy(dtype=float), rtol=0, atol=SUM_TOLERANCE
+        )
+
+    return damaged[damaged[list(DAMAGE_KINDS)].any(axis=1)]
+
+
+def to_damaged_ranges(damaged: pd.DataFrame) -> list[dict[str, Any]]:
+    """Return damaged hours as contiguous [start, end) ranges, with their damage."""
+    if damaged.empty:
+        return []
+
+    starts = damaged["range_start"].to_numpy()
+    ends = to_epoch_seconds(damaged.index) + SECONDS_PER_HOUR
+
+    # a new range begins wherever an hour doesn't follow on from the previous one
+    group = np.cumsum(np.concatenate(([True], starts[1:] > ends[:-1])))
+    ranges = []
+    for group_id in np.unique(group):
+        mask = group == group_id
+        ranges.append(
+            {
+                "start": datetime.fromtimestamp(starts[mask].min(), tz=BRUNEI_TZ),
+                "end": datetime.fromtimestamp(ends[mask].max(), tz=BRUNEI_TZ),
+                "damage": [
+                    kind
+                    for kind in DAMAGE_KINDS
+                    if damaged[kind].to_numpy()[mask].any()
+                ],
+            }
+        )
+    return ranges
+
+
+class HAUSMSIntegrityChecker:
+    """
+    Check an account's meter statistics for damage, a window at a time.
+
+    The last verified hour (and its sum) of every meter is remembered, so later runs
+    only check the statistics recorded since. Damaged ranges found along the way are
+    kept until repaired.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: HAUSMSConfigEntry) -> None:
+        """Initialize the checker."""
+        self.hass = hass
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass,
+            INTEGRITY_STORAGE_VERSION,
+            f"{DOMAIN}.{config_entry.entry_id}.integrity",
+        )
+        self._meters: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the remembered state of the previous runs."""
+        self._meters = await self._store.async_load() or {}
+
+    def get_damaged_ranges(self, meter_data: HAUSMSMeterData) -> list[dict[str, Any]]:
+        """Return the known damaged ranges of a meter's statistics."""
+        return [
+            damaged_range
+            | {
+                "start": datetime.fromisoformat(damaged_range["start"]),
+                "end": datetime.fromisoformat(damaged_range["end"]),
+            }
+            for damaged_range in self._meters.get(meter_data.statistic_id, {}).get(
+                "damaged", []
+            )
+        ]
+
+    def reset(self, meter_data: HAUSMSMeterData) -> None:
+        """Forget the damage of a meter, so the next run checks all of it again."""
+        self._meters[meter_data.statistic_id] = _new_meter_state()
+        self._store.async_delay_save(lambda: self._meters)
+
+    async def async_check(
+        self,
+        action: HAUSMSActionMetrics,
+        meter_data: HAUSMSMeterData,
+        max_windows: int = INTEGRITY_MAX_WINDOWS,
+    ) -> list[dict[str, Any]]:
+        """Check the statistics recorded since the last run, and return any damage."""
+        meter = self._meters.setdefault(meter_data.statistic_id, _new_meter_state())
+        last_verified = meter["last_verified"]
+        previous_start = (
+            datetime.fromtimestamp(last_verified, tz=BRUNEI_TZ)
+            if last_verified is not None
+            else None
+        )
+        previous_sum = meter["last_sum"]
+        damaged_ranges = []
+
+        if previous_start is not None:
+            # rewriting any hours up to the verified one since, like filling a gap or
+            # recalculating, shifts its sum, so carry on from its current sum instead
+            with action.phase("recorder_read") as phase:
+                verified = await get_sensor_statistics(
+                    self.hass,
+                    meter_data.statistic_id,
+                    previous_start,
+                    previous_start + timedelta(hours=1),
+                )
+                phase.rows += len(verified)
+            if verified != []:
+                previous_sum = float(statistics_to_dataframe(verified)["sum"].iloc[-1])
+            window_start = previous_start + timedelta(hours=1)
+            windows = range(max_windows)
+        else:
+            # without a verified hour yet, check the whole history through once
+            window_start = await get_first_statistic_start(
+                self.hass, meter_data.statistic_id
+            )
+            windows = itertools.count() if window_start is not None else range(0)
+        now = datetime.now(tz=BRUNEI_TZ)
+        for _ in windows:
+            if window_start > now:
+                break
+            window_end = window_start + INTEGRITY_WINDOW
+            with action.phase("recorder_read") as phase:
+                statistics = await get_sensor_statistics(
+                    self.hass, meter_data.statistic_id, window_start, window_end
+                )
+                phase.rows += len(statistics)
+            if statistics == []:
+                window_start = window_end
+                continue
+
+            with action.phase("check") as phase:
+                statistics_df = statistics_to_dataframe(statistics)
+                damaged = find_damaged_hours(
+                    statistics_df,
+                    previous_start,
+                    previous_sum,
+                    # the portal's hours usms already has cached, for free
+                    meter_data.hourly_consumptions[meter_data.unit],
+                )
+                damaged_ranges += to_damaged_ranges(damaged)
+                phase.rows += len(statistics_df)
+
+            previous_start = statistics_df.index[-1].to_pydatetime()
+            previous_sum = float(statistics_df["sum"].iloc[-1])
+            window_start = previous_start + timedelta(hours=1)
+
+        meter["last_verified"] = (
+            previous_start.timestamp() if previous_start is not None else None
+        )
+        meter["last_sum"] = previous_sum
+        meter["damaged"] = _merge_ranges(
+            meter["damaged"]
+            + [
+                damaged_range
+                | {
+                    "start": damaged_range["start"].isoformat(),
+                    "end": damaged_range["end"].isoformat(),
+                }
+                for damaged_range in damaged_ranges
+            ]
+        )
+        self._store.async_delay_save(lambda: self._meters)
+
+        if damaged_ranges:
+            LOGGER.warning(
+                "Found %d damaged ranges in the statistics of %s: %s",
+                len(damaged_ranges),
+                meter_data.statistic_id,
+                ", ".join(
+                    f"{damaged_range['start']} to {damaged_range['end']} "
+                    f"({', '.join(damaged_range['damage'])})"
+                    for damaged_range in damaged_ranges
+                ),
+            )
+        return self.get_damaged_ranges(meter_data)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the checker's state as a dict, for diagnostics."""
+        return self._meters
+
+
+def _new_meter_state() -> dict[str, Any]:
+    """Return the remembered state of a meter that was never checked."""
+    return {"last_verified": None, "last_sum": None, "damaged": []}
+
+
+def _merge_ranges(damaged_ranges: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge overlapping or adjacent damaged ranges, given with isoformat times."""
+    merged: list[dict[str, Any]] = []
+    for damaged_range in sorted(damaged_ranges, key=lambda r: r["start"]):
+        if merged and damaged_range["start"] <= merged[-1]["end"]:
+            merged[-1]["end"] = max(merged[-1]["end"], damaged_range["end"])
+            merged[-1]["damage"] = sorted(
+                set(merged[-1]["damage"]) | set(damaged_range["damage"])
+            )
+        else:
+            merged.append(dict(damaged_range))
+    return merged
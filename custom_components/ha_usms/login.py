@@ -0,0 +1,108 @@
+"""Logins to the USMS portal, handed over from the config flow to the entry setup."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.httpx_client import create_async_httpx_client
+from homeassistant.util.hass_dict import HassKey
+from usms import AsyncUSMSAccount
+
+from .client import HAUSMSClient
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from homeassistant.core import HomeAssistant
+
+# seconds a login made by the config flow can still be used to set up its entry
+LOGIN_HANDOVER_TTL = 60
+CLIENT_TIMEOUT = 60
+
+
+@dataclass
+class HAUSMSLogin:
+    """An initialized account logged in by the config flow, waiting for its setup."""
+
+    password: str
+    account: AsyncUSMSAccount
+
+
+DATA_LOGINS: HassKey[dict[str, HAUSMSLogin]] = HassKey(f"{DOMAIN}_logins")
+
+
+def create_account(
+    hass: HomeAssistant,
+    username: str,
+    password: str,
+) -> AsyncUSMSAccount:
+    """
+    Return a new, uninitialized account on an httpx client of its own.
+
+    usms keeps the login session in its client's headers, so accounts sharing Home
+    Assistant's httpx client would log each other out, and its timeout is kept to
+    this integration's own clients.
+    """
+    usms_client = HAUSMSClient(
+        client=create_async_httpx_client(hass, timeout=CLIENT_TIMEOUT),
+        username=username,
+        password=password,
+    )
+    return AsyncUSMSAccount(session=usms_client)
+
+
+async def async_login(
+    hass: HomeAssistant,
+    username: str,
+    password: str,
+) -> None:
+    """
+    Log in and initialize an account, keeping it for the setup of its entry.
+
+    The login is discarded after a while, if its flow was aborted or abandoned. Raises
+    USMSLoginError if the credentials are wrong.
+    """
+    account = create_account(hass, username, password)
+    await account.initialize()
+
+    login = HAUSMSLogin(password, account)
+    hass.data.setdefault(DATA_LOGINS, {})[username] = login
+    async_call_later(
+        hass, LOGIN_HANDOVER_TTL, partial(_async_expire_login, hass, username, login)
+    )
+
+
+def pop_login(
+    hass: HomeAssistant,
+    username: str,
+    password: str,
+) -> AsyncUSMSAccount | None:
+    """Return the account the config flow just logged in with these credentials."""
+    login = hass.data.get(DATA_LOGINS, {}).pop(username, None)
+    if login is None:
+        return None
+    if login.password != password:
+        LOGGER.debug("Discarding the login of %s, it no longer applies", username)
+        return None
+    LOGGER.debug("Reusing the login of %s made by the config flow", username)
+    return login.account
+
+
+@callback
+def _async_expire_login(
+    hass: HomeAssistant,
+    username: str,
+    login: HAUSMSLogin,
+    _now: datetime,
+) -> None:
+    """Discard a login no entry was set up with in time."""
+    logins = hass.data.get(DATA_LOGINS, {})
+    # unless it was taken, or replaced by a newer login since
+    if logins.get(username) is login:
+        LOGGER.debug("Discarding the unused login of %s", username)
+        del logins[username]
@@ -0,0 +1,166 @@
+"""Timing instrumentation for HA-USMS."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterator
+
+    from .client import HAUSMSClient
+    from .profiler import HAUSMSProfiler
+
+METRICS_HISTORY = 20
+
+
+@dataclass
+class HAUSMSPhaseMetrics:
+    """Timings and counts of a single phase of an action."""
+
+    name: str
+    calls: int = 0
+    duration: float = 0.0
+    requests: int = 0
+    rows: int = 0
+
+
+@dataclass
+class HAUSMSActionMetrics:
+    """Timings and counts of a single poll or button action, broken down per phase."""
+
+    action: str
+    started: datetime
+    duration: float = 0.0
+    requests: int = 0
+    logins: int = 0
+    error: str | None = None
+    phases: dict[str, HAUSMSPhaseMetrics] = field(default_factory=dict)
+
+    _client: HAUSMSClient | None = field(default=None, repr=False)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[HAUSMSPhaseMetrics]:
+        """Time a phase, accumulating into any earlier run of the same phase."""
+        phase = self.phases.setdefault(name, HAUSMSPhaseMetrics(name))
+        requests = self._client.requests if self._client is not None else 0
+        started = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase.calls += 1
+            phase.duration += time.perf_counter() - started
+            if self._client is not None:
+                phase.requests += self._client.requests - requests
+
+    async def iter_phase[T](
+        self,
+        name: str,
+        iterator: AsyncIterator[T],
+        rows: Callable[[T], int] | None = None,
+    ) -> AsyncIterator[T]:
+        """Time fetching each item of an async iterator as a phase, like paged reads."""
+        while True:
+            with self.phase(name) as phase:
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                if rows is not None:
+                    phase.rows += rows(item)
+            yield item
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dict, for diagnostics."""
+        return {
+            "action": self.action,
+            "started": self.started.isoformat(),
+            "duration": round(self.duration, 3),
+            "requests": self.requests,
+            "logins": self.logins,
+            "error": self.error,
+            "phases": {
+                name: asdict(phase) | {"duration": round(phase.duration, 3)}
+                for name, phase in self.phases.items()
+            },
+        }
+
+
+class HAUSMSMetrics:
+    """Collect timings of the most recent polls and button actions."""
+
+    def __init__(
+        self,
+        client: HAUSMSClient | None = None,
+        profiler: HAUSMSProfiler | None = None,
+    ) -> None:
+        """Initialize the collector."""
+        self.client = client
+        self.profiler = profiler
+        self.last_poll: HAUSMSActionMetrics | None = None
+        self.recent: deque[HAUSMSActionMetrics] = deque(maxlen=METRICS_HISTORY)
+
+    @contextmanager
+    def action(self, name: str) -> Iterator[HAUSMSActionMetrics]:
+        """Time a whole poll or button action, and keep it once finished."""
+        action = HAUSMSActionMetrics(
+            action=name,
+            started=datetime.now().astimezone(),
+            _client=self.client,
+        )
+        client = self.client
+        requests = client.requests if client is not None else 0
+        logins = client.logins if client is not None else 0
+        login_duration = client.login_duration if client is not None else 0.0
+        profile = (
+            self.profiler.profile(name) if self.profiler is not None else nullcontext()
+        )
+        started = time.perf_counter()
+        try:
+            with profile:
+                yield action
+        except Exception as exception:
+            action.error = repr(exception)
+            raise
+        finally:
+            action.duration = time.perf_counter() - started
+            if client is not None:
+                action.requests = client.requests - requests
+                action.logins = client.logins - logins
+                if action.logins:
+                    # logins happen implicitly inside other phases, whose timings
+                    # therefore include them as well
+                    login = action.phases.setdefault(
+                        "login", HAUSMSPhaseMetrics("login")
+                    )
+                    login.calls += action.logins
+                    login.duration += client.login_duration - login_duration
+
+            if name == "poll":
+                self.last_poll = action
+            self.recent.append(action)
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug(
+                    "Finished %s in %.3fs with %d requests: %s",
+                    name,
+                    action.duration,
+                    action.requests,
+                    ", ".join(
+                        f"{phase.name} {phase.duration:.3f}s"
+                        for phase in action.phases.values()
+                    ),
+                )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the collected metrics as a dict, for diagnostics."""
+        return {
+            "last_poll": self.last_poll.as_dict() if self.last_poll else None,
+            "recent": [action.as_dict() for action in self.recent],
+        }
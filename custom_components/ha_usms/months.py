@@ -0,0 +1,179 @@
+"""Daily consumptions of HA-USMS meters' recent months, kept across restarts."""
+
+from __future__ import annotations
+
+import calendar
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .epoch import BRUNEI_UTC_OFFSET, SECONDS_PER_DAY, date_to_epoch_day
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import date
+
+    from homeassistant.core import HomeAssistant
+
+    from .data import HAUSMSConfigEntry, HAUSMSMeterData
+
+MONTHS_STORAGE_VERSION = 1
+# months kept per meter, this month and last month
+MONTHS_KEPT = 2
+# final days of a month the portal may still revise after it has rolled over, and
+# days after the rollover it may still revise them for
+MONTH_REVISION_DAYS = 2
+# requests usms sends to fetch a day's hourly consumptions, or a month's daily ones
+DAY_FETCH_REQUESTS = 3
+MONTH_FETCH_REQUESTS = 4
+
+
+def get_month_key(month: date) -> str:
+    """Return the storage key of a month."""
+    return f"{month.year}-{month.month:02d}"
+
+
+def get_last_month(month: date) -> date:
+    """Return the first day of the month before a month's first day."""
+    return (month - timedelta(days=1)).replace(day=1)
+
+
+def get_month_days(month: date) -> int:
+    """Return the number of days of a month."""
+    return calendar.monthrange(month.year, month.month)[1]
+
+
+def get_final_days(month: date) -> list[int]:
+    """Return the final days of a month, which the portal may still revise."""
+    month_days = get_month_days(month)
+    return list(range(month_days - MONTH_REVISION_DAYS + 1, month_days + 1))
+
+
+def get_day_end(month: date, day: int) -> int:
+    """Return the end of a day of a month, in seconds since the epoch."""
+    return (
+        date_to_epoch_day(month.replace(day=day)) + 1
+    ) * SECONDS_PER_DAY - BRUNEI_UTC_OFFSET
+
+
+def get_days_to_check(month: date, checked: dict[int, float], now: float) -> list[int]:
+    """
+    Return the days of a past month that need fetching, given when each was last.
+
+    Every day needs fetching once after it has ended. The final days need fetching
+    after the month has ended instead, and once more after their revision window, so
+    they are fetched at most once while the portal may still revise them.
+    """
+    month_days = get_month_days(month)
+    month_end = get_day_end(month, month_days)
+    revision_end = month_end + MONTH_REVISION_DAYS * SECONDS_PER_DAY
+    final_days = get_final_days(month)
+
+    days = []
+    for day in range(1, month_days + 1):
+        last_checked = checked.get(day, float("-inf"))
+        if day in final_days:
+            is_due = last_checked < month_end or (
+                now >= revision_end and last_checked < revision_end
+            )
+        else:
+            is_due = last_checked < get_day_end(month, day)
+        if is_due:
+            days.append(day)
+    return days
+
+
+class HAUSMSMonthTotals:
+    """
+    Daily consumptions of each meter's this and last month.
+
+    This month's daily consumptions are kept every time they are fetched, along with
+    when each day was, even if the portal had nothing for it. By the time a month
+    rolls over it has been seen almost completely, and only the days not seen since
+    they ended, and the final days the portal may still revise, need fetching again.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: HAUSMSConfigEntry) -> None:
+        """Initialize the months."""
+        self._store: Store[dict[str, dict[str, dict[str, Any]]]] = Store(
+            hass,
+            MONTHS_STORAGE_VERSION,
+            f"{DOMAIN}.{config_entry.entry_id}.months",
+        )
+        self._meters: dict[str, dict[str, dict[str, Any]]] = {}
+
+    async def async_load(self) -> None:
+        """Load the months kept before."""
+        self._meters = await self._store.async_load() or {}
+
+    def get(self, meter_data: HAUSMSMeterData, month: date) -> pd.Series:
+        """Return the kept daily consumptions of a meter's month, by day of month."""
+        days = self._get_month(meter_data, month)["consumptions"]
+        return pd.Series(
+            list(days.values()), index=[int(day) for day in days], dtype=float
+        ).sort_index()
+
+    def get_days_to_check(
+        self,
+        meter_data: HAUSMSMeterData,
+        month: date,
+        now: float | None = None,
+    ) -> list[int]:
+        """Return the days of a meter's past month that need fetching."""
+        checked = self._get_month(meter_data, month)["checked"]
+        return get_days_to_check(
+            month,
+            {int(day): last_checked for day, last_checked in checked.items()},
+            time.time() if now is None else now,
+        )
+
+    def update(
+        self,
+        meter_data: HAUSMSMeterData,
+        month: date,
+        consumptions: pd.Series,
+        days: Iterable[int],
+    ) -> None:
+        """
+        Keep the daily consumptions of a meter's month, by day of month.
+
+        The given days are the ones just fetched, recorded as checked now, including
+        the ones the portal had no consumptions for.
+        """
+        now = time.time()
+        consumptions = consumptions.dropna()
+        months = self._meters.setdefault(meter_data.no, {})
+        kept = months.setdefault(
+            get_month_key(month), {"consumptions": {}, "checked": {}}
+        )
+        kept["consumptions"].update(
+            {
+                str(day): float(consumption)
+                for day, consumption in zip(
+                    _get_days_of_month(consumptions.index),
+                    consumptions.tolist(),
+                    strict=True,
+                )
+            }
+        )
+        kept["checked"].update(dict.fromkeys(map(str, days), now))
+        for month_key in sorted(months)[:-MONTHS_KEPT]:
+            del months[month_key]
+        self._store.async_delay_save(lambda: self._meters)
+
+    def _get_month(self, meter_data: HAUSMSMeterData, month: date) -> dict[str, Any]:
+        """Return what is kept of a meter's month, or nothing checked yet."""
+        return self._meters.get(meter_data.no, {}).get(
+            get_month_key(month), {"consumptions": {}, "checked": {}}
+        )
+
+
+def _get_days_of_month(index: pd.Index) -> list[int]:
+    """Return the days of month of an index of dates, or of days of month as is."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.day.tolist()
+    return [int(day) for day in index]
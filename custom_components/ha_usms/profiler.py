@@ -0,0 +1,87 @@
+"""On-demand profiling for HA-USMS."""
+
+from __future__ import annotations
+
+import cProfile
+import pstats
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from homeassistant.core import HomeAssistant
+
+PROFILE_TOP_FUNCTIONS = 30
+
+
+class HAUSMSProfiler:
+    """Profile the next few polls or button actions with cProfile."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler, disarmed."""
+        self.hass = hass
+        self.remaining = 0
+        self._profile: cProfile.Profile | None = None
+
+    def arm(self, count: int) -> None:
+        """Profile the next `count` polls or button actions."""
+        LOGGER.info("Profiling the next %d polls or button actions", count)
+        self.remaining = count
+
+    def disarm(self) -> None:
+        """Stop any running profile, and skip any remaining ones."""
+        self.remaining = 0
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """Profile the wrapped action if armed, then write out its profile."""
+        # skip if not armed, or if an outer action is already being profiled
+        if self.remaining <= 0 or self._profile is not None:
+            yield
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as exception:
+            # another profiler, e.g. Home Assistant's own, is already running
+            LOGGER.warning("Unable to profile %s: %s", name, exception)
+            yield
+            return
+
+        self._profile = profile
+        self.remaining -= 1
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._profile = None
+            self.hass.async_add_executor_job(self._write_profile, profile, name)
+
+    def _write_profile(self, profile: cProfile.Profile, name: str) -> None:
+        """Write the profile and a summary of its top functions to the config dir."""
+        timestamp = datetime.now().astimezone().strftime("%Y%m%d_%H%M%S_%f")
+        path = Path(self.hass.config.path(f"{DOMAIN}_profile_{name}_{timestamp}"))
+
+        profile.dump_stats(path.with_suffix(".prof"))
+        with path.with_suffix(".txt").open("w") as file:
+            stats = pstats.Stats(profile, stream=file)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+                PROFILE_TOP_FUNCTIONS
+            )
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(PROFILE_TOP_FUNCTIONS)
+
+        LOGGER.info(
+            "Wrote profile of %s to %s, with a summary in %s",
+            name,
+            path.with_suffix(".prof"),
+            path.with_suffix(".txt"),
+        )
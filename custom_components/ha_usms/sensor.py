@@ -4,9 +4,19 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from homeassistant.components.recorder.statistics import async_import_statistics
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    async_import_statistics,
+)
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from slugify import slugify
 
 from .const import LOGGER
 from .entity import HAUSMSEntity
@@ -16,6 +26,7 @@ if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+    from .buffer import HAUSMSConsumptionBuffer
     from .coordinator import HAUSMSDataUpdateCoordinator
     from .data import HAUSMSConfigEntry, HAUSMSMeterData
 
@@ -35,6 +46,23 @@ async def async_setup_entry(
         )
         for meter_data in coordinator.data
     )
+    async_add_entities(
+        sensor_class(coordinator, meter_data)
+        for meter_data in coordinator.data
+        for sensor_class in (
+            HAUSMSTodayConsumptionSensor,
+            HAUSMSRollingConsumptionSensor7Days,
+            HAUSMSRollingConsumptionSensor30Days,
+            HAUSMSAverageDailyConsumptionSensor,
+            HAUSMSDaysRemainingSensor,
+        )
+    )
+    async_add_entities(
+        [
+            HAUSMSLastPollDurationSensor(coordinator),
+            HAUSMSLastPollRequestsSensor(coordinator),
+        ]
+    )
 
 
 class HAUSMSMeterSensor(HAUSMSEntity, SensorEntity):
@@ -58,11 +86,29 @@ class HAUSMSMeterSensor(HAUSMSEntity, SensorEntity):
             LOGGER.info(
                 f"Importing {len(temp_meter_data.new_statistics)} new statistics for statistic_id: {self.meter_data.statistic_id}"  # noqa: E501
             )
-            async_import_statistics(
-                self.hass,
-                self.metadata,
-                temp_meter_data.new_statistics,
+            with self.coordinator.import_action.phase("import") as phase:
+                async_import_statistics(
+                    self.hass,
+                    self.metadata,
+                    temp_meter_data.new_statistics,
+                )
+                phase.rows += len(temp_meter_data.new_statistics)
+            if temp_meter_data.new_hourly_consumptions is not None:
+                self.coordinator.digests.update(
+                    temp_meter_data, temp_meter_data.new_hourly_consumptions
+                )
+
+        if temp_meter_data.new_cost_statistics != []:
+            LOGGER.info(
+                f"Importing {len(temp_meter_data.new_cost_statistics)} new cost statistics for statistic_id: {self.meter_data.cost_statistic_id}"  # noqa: E501
             )
+            with self.coordinator.import_action.phase("import") as phase:
+                async_add_external_statistics(
+                    self.hass,
+                    self.meter_data.cost_metadata,
+                    temp_meter_data.new_cost_statistics,
+                )
+                phase.rows += len(temp_meter_data.new_cost_statistics)
 
         if self.meter_data.last_refresh != temp_meter_data.last_refresh:
             if self.meter_data.last_update != temp_meter_data.last_update:
@@ -71,16 +117,15 @@ class HAUSMSMeterSensor(HAUSMSEntity, SensorEntity):
                 LOGGER.info(f"{self.name} was refreshed, but no new updates were found")
             self.meter_data = temp_meter_data
             self.async_write_ha_state()
+        elif self.meter_data.updated != temp_meter_data.updated:
+            LOGGER.debug("%s caught up on its deferred fields", self.name)
+            self.meter_data = temp_meter_data
+            self.async_write_ha_state()
 
     @property
     def device_class(self) -> str | None:
         """Return device class of the meter sensor."""
-        meter_type = self.meter_data.type.upper()
-        if "ELECTRIC" in meter_type or "ENERGY" in meter_type:
-            return SensorDeviceClass.ENERGY
-        if "WATER" in meter_type:
-            return SensorDeviceClass.WATER
-        return None
+        return _get_device_class(self.meter_data)
 
     @property
     def metadata(self) -> StatisticMetaData:
@@ -133,4 +178,230 @@ class HAUSMSMeterSensor(HAUSMSEntity, SensorEntity):
         attrs["this_month_consumption"] = self.meter_data.this_month_total_consumption
         attrs["this_month_cost"] = self.meter_data.this_month_total_cost
 
+        # how fresh each separately fetched field is
+        for field, updated in self.meter_data.updated.items():
+            attrs[f"{field}_updated"] = updated
+        attrs["deferred"] = self.meter_data.deferred
+
         return attrs
+
+
+class HAUSMSMeterAggregateSensor(HAUSMSEntity, SensorEntity):
+    """Base class for HA-USMS meter sensors aggregated from the rolling buffer."""
+
+    aggregate_name: str
+
+    def __init__(
+        self,
+        coordinator: HAUSMSDataUpdateCoordinator,
+        meter_data: HAUSMSMeterData,
+    ) -> None:
+        """Initialize the aggregate sensor class."""
+        super().__init__(coordinator)
+        self.meter_data = meter_data
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update aggregate sensor with latest data from coordinator."""
+        self.meter_data = self.coordinator.get_meter_data_by_no(self.meter_data.no)
+        self.async_write_ha_state()
+
+    @property
+    def buffer(self) -> HAUSMSConsumptionBuffer | None:
+        """Return the rolling buffer of the meter."""
+        return self.coordinator.buffers.get(self.meter_data.no)
+
+    @property
+    def name(self) -> str:
+        """Return the name of the aggregate sensor."""
+        return f"{self.meter_data.name} {self.aggregate_name}"
+
+    @property
+    def unique_id(self) -> str:
+        """Return unique id of the aggregate sensor."""
+        return slugify(self.name, separator="_")
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the last hour the aggregate is up to."""
+        return {"last_hour": self.buffer.last_hour if self.buffer else None}
+
+
+class HAUSMSTodayConsumptionSensor(HAUSMSMeterAggregateSensor):
+    """Consumption of the meter so far today."""
+
+    aggregate_name = "Today Consumption"
+
+    @property
+    def device_class(self) -> str | None:
+        """Return device class of the aggregate sensor."""
+        return _get_device_class(self.meter_data)
+
+    @property
+    def native_unit_of_measurement(self) -> str:
+        """Return the unit of measurement of the aggregate sensor."""
+        return self.meter_data.unit
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the consumption so far today."""
+        return self.buffer.today if self.buffer else None
+
+
+class HAUSMSRollingConsumptionSensor(HAUSMSMeterAggregateSensor):
+    """Consumption of the meter within the last few days."""
+
+    days: int
+
+    @property
+    def device_class(self) -> str | None:
+        """Return device class of the aggregate sensor."""
+        return _get_device_class(self.meter_data)
+
+    @property
+    def native_unit_of_measurement(self) -> str:
+        """Return the unit of measurement of the aggregate sensor."""
+        return self.meter_data.unit
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the consumption within the last few days."""
+        return self.buffer.rolling_sum(self.days) if self.buffer else None
+
+
+class HAUSMSRollingConsumptionSensor7Days(HAUSMSRollingConsumptionSensor):
+    """Consumption of the meter within the last 7 days."""
+
+    aggregate_name = "Last 7 Days Consumption"
+    days = 7
+
+
+class HAUSMSRollingConsumptionSensor30Days(HAUSMSRollingConsumptionSensor):
+    """Consumption of the meter within the last 30 days."""
+
+    aggregate_name = "Last 30 Days Consumption"
+    days = 30
+
+
+class HAUSMSAverageDailyConsumptionSensor(HAUSMSMeterAggregateSensor):
+    """Average daily consumption of the meter over the last 7 days."""
+
+    aggregate_name = "Average Daily Consumption"
+    days = 7
+
+    @property
+    def native_unit_of_measurement(self) -> str:
+        """Return the unit of measurement of the aggregate sensor."""
+        return f"{self.meter_data.unit}/d"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the average daily consumption."""
+        return self.buffer.average_daily(self.days) if self.buffer else None
+
+
+class HAUSMSDaysRemainingSensor(HAUSMSMeterAggregateSensor):
+    """Days the meter's remaining units last at its average daily consumption."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.DAYS
+
+    aggregate_name = "Days Remaining"
+    days = 7
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the days the remaining units last."""
+        if self.buffer is None:
+            return None
+        return self.buffer.days_remaining(self.meter_data.remaining_unit, self.days)
+
+
+class HAUSMSDiagnosticSensor(HAUSMSEntity, SensorEntity):
+    """Base class for HA-USMS account diagnostic sensors."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    metric_name: str
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info for this entity."""
+        return DeviceInfo(
+            identifiers={
+                (
+                    self.coordinator.config_entry.domain,
+                    self.coordinator.config_entry.entry_id,
+                ),
+            },
+        )
+
+    @property
+    def name(self) -> str:
+        """Return the name of the diagnostic sensor."""
+        return f"{self.coordinator.config_entry.title} {self.metric_name}"
+
+    @property
+    def unique_id(self) -> str:
+        """Return unique id of the diagnostic sensor."""
+        return slugify(self.name, separator="_")
+
+
+class HAUSMSLastPollDurationSensor(HAUSMSDiagnosticSensor):
+    """Duration of the last coordinator poll."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_display_precision = 3
+
+    metric_name = "Last Poll Duration"
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the duration of the last poll."""
+        last_poll = self.coordinator.metrics.last_poll
+        return round(last_poll.duration, 3) if last_poll is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the duration of each phase of the last poll."""
+        last_poll = self.coordinator.metrics.last_poll
+        if last_poll is None:
+            return {}
+        return {
+            name: round(phase.duration, 3) for name, phase in last_poll.phases.items()
+        }
+
+
+class HAUSMSLastPollRequestsSensor(HAUSMSDiagnosticSensor):
+    """Number of portal requests made by the last coordinator poll."""
+
+    metric_name = "Last Poll Requests"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the number of requests of the last poll."""
+        last_poll = self.coordinator.metrics.last_poll
+        return last_poll.requests if last_poll is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the number of logins and requests of each phase of the last poll."""
+        last_poll = self.coordinator.metrics.last_poll
+        if last_poll is None:
+            return {}
+        return {"logins": last_poll.logins} | {
+            name: phase.requests for name, phase in last_poll.phases.items()
+        }
+
+
+def _get_device_class(meter_data: HAUSMSMeterData) -> SensorDeviceClass | None:
+    """Return the device class for the consumption of a meter."""
+    meter_type = meter_data.type.upper()
+    if "ELECTRIC" in meter_type or "ENERGY" in meter_type:
+        return SensorDeviceClass.ENERGY
+    if "WATER" in meter_type:
+        return SensorDeviceClass.WATER
+    return None
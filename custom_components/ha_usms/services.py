@@ -0,0 +1,358 @@
+"""Services for HA-USMS."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+
+from .const import DOMAIN, LOGGER
+from .statistics import (
+    async_download_statistics,
+    async_export_statistics,
+    async_recalculate_statistics,
+    async_repair_statistics,
+    async_restore_statistics,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .coordinator import HAUSMSDataUpdateCoordinator
+    from .data import HAUSMSMeterData
+
+SERVICE_CHECK_STATISTICS = "check_statistics"
+SERVICE_EXPORT_STATISTICS = "export_statistics"
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+SERVICE_PROFILE = "profile"
+SERVICE_RECALCULATE_STATISTICS = "recalculate_statistics"
+SERVICE_RESTORE_STATISTICS = "restore_statistics"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_COUNT = "count"
+ATTR_END = "end"
+ATTR_FULL = "full"
+ATTR_PARALLEL = "parallel"
+ATTR_REFRESH = "refresh"
+ATTR_REPAIR = "repair"
+ATTR_START = "start"
+
+DEFAULT_PARALLEL = 2
+MAX_PARALLEL = 5
+
+CONFIG_ENTRIES_SCHEMA = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+}
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        **CONFIG_ENTRIES_SCHEMA,
+        vol.Optional(ATTR_COUNT, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=20)
+        ),
+        vol.Optional(ATTR_REFRESH, default=False): cv.boolean,
+    }
+)
+
+METERS_SCHEMA = {
+    **CONFIG_ENTRIES_SCHEMA,
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_PARALLEL, default=DEFAULT_PARALLEL): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL)
+    ),
+}
+
+STATISTICS_SCHEMA = {
+    **METERS_SCHEMA,
+    vol.Optional(ATTR_START): cv.date,
+}
+
+IMPORT_STATISTICS_SCHEMA = vol.Schema(
+    {
+        **STATISTICS_SCHEMA,
+        vol.Optional(ATTR_END): cv.date,
+    }
+)
+
+# running sums carry on past any end date, so recalculating only takes a start
+RECALCULATE_STATISTICS_SCHEMA = vol.Schema(STATISTICS_SCHEMA)
+
+EXPORT_STATISTICS_SCHEMA = RESTORE_STATISTICS_SCHEMA = vol.Schema(METERS_SCHEMA)
+
+CHECK_STATISTICS_SCHEMA = vol.Schema(
+    {
+        **METERS_SCHEMA,
+        vol.Optional(ATTR_FULL, default=False): cv.boolean,
+        vol.Optional(ATTR_REPAIR, default=False): cv.boolean,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the HA-USMS services."""
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next polls or button actions of the given accounts."""
+        for coordinator in _get_coordinators(hass, call):
+            coordinator.profiler.arm(call.data[ATTR_COUNT])
+            if call.data[ATTR_REFRESH]:
+                await coordinator.async_request_refresh()
+
+    async def async_import(call: ServiceCall) -> ServiceResponse:
+        """Download and import the statistics of the given meters."""
+        start, end = call.data.get(ATTR_START), call.data.get(ATTR_END)
+        if start is not None and end is not None and start > end:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_date_range",
+            )
+
+        async def async_job(
+            coordinator: HAUSMSDataUpdateCoordinator,
+            meter_data: HAUSMSMeterData,
+        ) -> int:
+            return await async_download_statistics(coordinator, meter_data, start, end)
+
+        return await _async_run_batch(hass, call, async_job)
+
+    async def async_recalculate(call: ServiceCall) -> ServiceResponse:
+        """Recalculate the statistics' running sums of the given meters."""
+        start = call.data.get(ATTR_START)
+
+        async def async_job(
+            coordinator: HAUSMSDataUpdateCoordinator,
+            meter_data: HAUSMSMeterData,
+        ) -> int:
+            return await async_recalculate_statistics(coordinator, meter_data, start)
+
+        return await _async_run_batch(hass, call, async_job)
+
+    async def async_export(call: ServiceCall) -> ServiceResponse:
+        """Export the recorded hourly consumptions of the given meters to files."""
+        return await _async_run_batch(hass, call, async_export_statistics)
+
+    async def async_restore(call: ServiceCall) -> ServiceResponse:
+        """Import the exported hourly consumptions of the given meters."""
+        return await _async_run_batch(hass, call, async_restore_statistics)
+
+    async def async_check(call: ServiceCall) -> ServiceResponse:
+        """Check the statistics of the given meters, and optionally repair them."""
+
+        async def async_job(
+            coordinator: HAUSMSDataUpdateCoordinator,
+            meter_data: HAUSMSMeterData,
+        ) -> dict[str, Any]:
+            if call.data[ATTR_FULL]:
+                coordinator.integrity.reset(meter_data)
+            with coordinator.metrics.action("check_statistics") as action:
+                damaged_ranges = await coordinator.integrity.async_check(
+                    action, meter_data
+                )
+            rows = 0
+            if call.data[ATTR_REPAIR] and damaged_ranges:
+                rows = await async_repair_statistics(coordinator, meter_data)
+            return {
+                "rows": rows,
+                "damaged": [
+                    damaged_range
+                    | {
+                        "start": damaged_range["start"].isoformat(),
+                        "end": damaged_range["end"].isoformat(),
+                    }
+                    for damaged_range in damaged_ranges
+                ],
+            }
+
+        return await _async_run_batch(hass, call, async_job)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STATISTICS,
+        async_import,
+        schema=IMPORT_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECALCULATE_STATISTICS,
+        async_recalculate,
+        schema=RECALCULATE_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_STATISTICS,
+        async_export,
+        schema=EXPORT_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESTORE_STATISTICS,
+        async_restore,
+        schema=RESTORE_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CHECK_STATISTICS,
+        async_check,
+        schema=CHECK_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _async_run_batch(
+    hass: HomeAssistant,
+    call: ServiceCall,
+    async_job: Callable[
+        [HAUSMSDataUpdateCoordinator, HAUSMSMeterData],
+        Awaitable[int | dict[str, Any]],
+    ],
+) -> ServiceResponse:
+    """
+    Run a statistics job for every requested meter, as a batch.
+
+    A job returns the number of rows it wrote, or a dict of results with the rows.
+
+    Meters of the same account share one USMS session, so they are worked through one
+    after the other, while up to `parallel` accounts are worked through at once. If no
+    response is requested, the batch runs in the background and the call returns.
+    """
+    meters = _get_meters(hass, call)
+    semaphore = asyncio.Semaphore(call.data[ATTR_PARALLEL])
+
+    async def async_run_account(
+        coordinator: HAUSMSDataUpdateCoordinator,
+        meters_data: list[HAUSMSMeterData],
+    ) -> list[dict[str, Any]]:
+        results = []
+        async with semaphore:
+            for meter_data in meters_data:
+                result = {"statistic_id": meter_data.statistic_id, "rows": 0}
+                try:
+                    job_result = await async_job(coordinator, meter_data)
+                    if isinstance(job_result, dict):
+                        result |= job_result
+                    else:
+                        result["rows"] = job_result
+                except Exception as exception:  # noqa: BLE001
+                    LOGGER.error(
+                        "Failed to %s for %s: %s",
+                        call.service.replace("_", " "),
+                        meter_data.statistic_id,
+                        exception,
+                    )
+                    result["error"] = str(exception)
+                results.append(result)
+        return results
+
+    async def async_run() -> dict[str, Any]:
+        results = await asyncio.gather(
+            *(
+                async_run_account(coordinator, meters_data)
+                for coordinator, meters_data in meters.items()
+            )
+        )
+        meter_results = [result for results in results for result in results]
+        rows = sum(result["rows"] for result in meter_results)
+        LOGGER.info(
+            "Finished %s for %d meters, %d rows written",
+            call.service.replace("_", " "),
+            len(meter_results),
+            rows,
+        )
+        return {"meters": meter_results, "rows": rows}
+
+    if not call.return_response:
+        hass.async_create_background_task(
+            async_run(), f"{DOMAIN}_{call.service}", eager_start=True
+        )
+        return None
+    return await async_run()
+
+
+def _get_coordinators(
+    hass: HomeAssistant,
+    call: ServiceCall,
+) -> list[HAUSMSDataUpdateCoordinator]:
+    """Return the coordinators of the requested, or else all, loaded accounts."""
+    entry_ids = call.data.get(ATTR_CONFIG_ENTRY_ID)
+
+    coordinators = []
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry_ids is not None and entry.entry_id not in entry_ids:
+            continue
+        if entry.state is not ConfigEntryState.LOADED:
+            if entry_ids is None:
+                # an account that failed to set up doesn't hold up the others
+                LOGGER.debug("Skipping %s, it is not loaded", entry.title)
+                continue
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="entry_not_loaded",
+                translation_placeholders={"entry": entry.title},
+            )
+        coordinators.append(entry.runtime_data.coordinator)
+
+    if entry_ids is not None and len(coordinators) != len(entry_ids):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="entry_not_found",
+        )
+    return coordinators
+
+
+def _get_meters(
+    hass: HomeAssistant,
+    call: ServiceCall,
+) -> dict[HAUSMSDataUpdateCoordinator, list[HAUSMSMeterData]]:
+    """Return the requested, or else all, meters grouped by their account."""
+    coordinators = _get_coordinators(hass, call)
+    entity_ids = call.data.get(ATTR_ENTITY_ID)
+    if entity_ids is None:
+        return {coordinator: list(coordinator.data) for coordinator in coordinators}
+
+    entity_registry = er.async_get(hass)
+    meters: dict[HAUSMSDataUpdateCoordinator, list[HAUSMSMeterData]] = {}
+    for entity_id in entity_ids:
+        entity = entity_registry.async_get(entity_id)
+        meter = next(
+            (
+                (coordinator, meter_data)
+                for coordinator in coordinators
+                for meter_data in coordinator.data
+                if entity is not None and meter_data.unique_id == entity.unique_id
+            ),
+            None,
+        )
+        if meter is None:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="meter_not_found",
+                translation_placeholders={"entity_id": entity_id},
+            )
+        coordinator, meter_data = meter
+        if meter_data not in meters.setdefault(coordinator, []):
+            meters[coordinator].append(meter_data)
+    return meters
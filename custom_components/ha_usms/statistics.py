@@ -0,0 +1,636 @@
+"""Statistics download, recalculation and repair for HA-USMS meters."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    async_import_statistics,
+)
+from homeassistant.exceptions import HomeAssistantError
+from usms import BRUNEI_TZ
+from usms.utils.helpers import new_consumptions_dataframe
+
+from .const import DOMAIN, LOGGER
+from .cost import calculate_hourly_costs, costs_to_statistics_dataframe, get_tariff
+from .epoch import SECONDS_PER_HOUR, to_epoch_seconds
+from .helpers import (
+    consumptions_series_to_dataframe,
+    cumulative_sum,
+    dataframe_diff,
+    dataframe_to_statistics,
+    get_first_statistic_start,
+    get_incomplete_days,
+    get_last_statistic_sum,
+    get_month_start,
+    get_sensor_statistics,
+    iter_sensor_statistics,
+    statistics_to_dataframe,
+)
+from .integrity import DAMAGE_MISSING, DAMAGE_STATE
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .coordinator import HAUSMSDataUpdateCoordinator
+    from .data import HAUSMSMeterData
+    from .metrics import HAUSMSActionMetrics
+
+EXPORT_DIRECTORY = "exports"
+
+
+def date_to_datetime(day: date) -> datetime:
+    """Return the start of the given day in Brunei time."""
+    return datetime.combine(day, time(), tzinfo=BRUNEI_TZ)
+
+
+def get_export_path(hass: HomeAssistant, meter_data: HAUSMSMeterData) -> Path:
+    """Return the path of a meter's exported hourly history."""
+    return Path(
+        hass.config.path(DOMAIN, EXPORT_DIRECTORY, f"{meter_data.unique_id}.npz")
+    )
+
+
+async def async_download_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+    start: date | None = None,
+    end: date | None = None,
+) -> int:
+    """
+    Download a meter's hourly consumptions and import them as statistics.
+
+    Without a start date, the meter's whole history is downloaded and merged in, and
+    its day digests rebuilt. Otherwise only the days from start to end (or today), and
+    of those, only the days that changed since they were last imported, or that the
+    recorder lost hours of. The running sums are updated from there on.
+
+    Return the number of statistics rows written.
+    """
+    with coordinator.metrics.action("download_statistics") as action:
+        if start is None:
+            LOGGER.info(
+                "Fetching all consumptions history for %s, please wait...",
+                meter_data.name,
+            )
+            with action.phase("day_fetch") as phase:
+                all_hourly_consumptions = await meter_data.get_all_hourly_consumptions()
+                phase.rows += len(all_hourly_consumptions)
+            # digests can't tell what the recorder still has, so merge in every day,
+            # only the rows that differ are written anyway
+            coordinator.digests.reset(meter_data)
+            hourly_consumptions = all_hourly_consumptions.dropna()
+        else:
+            today = datetime.now(tz=BRUNEI_TZ).date()
+            end = min(end or today, today)
+            LOGGER.info(
+                "Fetching consumptions history from %s to %s for %s, please wait...",
+                start,
+                end,
+                meter_data.name,
+            )
+            days = [
+                date_to_datetime(start + timedelta(days=i))
+                for i in range((end - start).days + 1)
+            ]
+            await _async_forget_incomplete_days(
+                coordinator, action, meter_data, days[0], days[-1] + timedelta(days=1)
+            )
+            hourly_consumptions = _filter_changed_days(
+                coordinator,
+                action,
+                meter_data,
+                await _async_fetch_days(action, meter_data, days),
+            )
+
+        if hourly_consumptions.empty:
+            LOGGER.info(
+                "No consumptions changed since the last download for %s",
+                meter_data.name,
+            )
+            return 0
+
+        rows = await _async_stream_import(
+            coordinator, action, meter_data, hourly_consumptions, overwrite=True
+        )
+        coordinator.digests.update(meter_data, hourly_consumptions)
+
+    LOGGER.info("Finished downloading consumptions history for %s", meter_data.name)
+    return rows or 0
+
+
+async def async_recalculate_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+    start: date | None = None,
+) -> int:
+    """
+    Recalculate the running sums of a meter's recorded statistics.
+
+    The statistics are streamed a month at a time, carrying the running sum along.
+    Only rows from the start date on are rewritten, and only if their sum changed.
+    Return the number of statistics rows written.
+    """
+    with coordinator.metrics.action("recalculate_statistics") as action:
+        rows = await _async_stream_import(
+            coordinator,
+            action,
+            meter_data,
+            start=date_to_datetime(start) if start is not None else None,
+        )
+        if rows is None:
+            LOGGER.error("No statistics found for %s", meter_data.statistic_id)
+            return 0
+
+    LOGGER.info("Finished recalculating statistics for %s", meter_data.statistic_id)
+    return rows
+
+
+async def async_download_missing_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+) -> int:
+    """
+    Download the days missing from a meter's statistics, and import them.
+
+    The statistics are streamed a month at a time, once to find the days with missing
+    hours, and once more to merge in the downloaded days and carry the running sum.
+    Return the number of statistics rows written.
+    """
+    with coordinator.metrics.action("download_missing_statistics") as action:
+        today = date_to_datetime(datetime.now(tz=BRUNEI_TZ).date())
+        first_start = None
+        missing_days = []
+        async for window_start, window_end, statistics in action.iter_phase(
+            "recorder_read",
+            iter_sensor_statistics(
+                coordinator.hass, meter_data.statistic_id, end_time=today
+            ),
+            lambda window: len(window[2]),
+        ):
+            with action.phase("transform"):
+                statistics_df = statistics_to_dataframe(statistics)
+                if first_start is None:
+                    if statistics_df.empty:
+                        continue
+                    first_start = statistics_df.index.min().to_pydatetime()
+                missing_days += get_incomplete_days(
+                    statistics_df,
+                    max(window_start, first_start),
+                    min(window_end, today),
+                )
+        if first_start is None:
+            LOGGER.error("No statistics found for %s", meter_data.statistic_id)
+            return 0
+
+        # the recorder lost hours of these days, whatever was imported before
+        coordinator.digests.forget(meter_data, missing_days)
+        # Fetch statistics for each missing day, some may be incomplete upstream too
+        missing_statistics = _filter_changed_days(
+            coordinator,
+            action,
+            meter_data,
+            await _async_fetch_days(action, meter_data, missing_days),
+        )
+        if missing_statistics.empty:
+            LOGGER.info(
+                "No missing consumptions changed upstream for %s",
+                meter_data.statistic_id,
+            )
+            return 0
+
+        # recorded hours are kept as they are, only the missing ones are filled in
+        rows = await _async_stream_import(
+            coordinator, action, meter_data, missing_statistics
+        )
+        coordinator.digests.update(meter_data, missing_statistics)
+
+    LOGGER.info(
+        "Finished downloading missing statistics for %s", meter_data.statistic_id
+    )
+    return rows or 0
+
+
+async def async_repair_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+) -> int:
+    """
+    Rewrite the damaged ranges found by the integrity checker.
+
+    Days with missing hours or states that disagree with the portal are downloaded
+    again, and the running sums updated from there on, which also fixes broken sums.
+    Return the number of statistics rows written.
+    """
+    damaged_ranges = coordinator.integrity.get_damaged_ranges(meter_data)
+    if not damaged_ranges:
+        return 0
+
+    with coordinator.metrics.action("repair_statistics") as action:
+        days = sorted(
+            {
+                date_to_datetime(damaged_range["start"].date() + timedelta(days=i))
+                for damaged_range in damaged_ranges
+                if {DAMAGE_MISSING, DAMAGE_STATE} & set(damaged_range["damage"])
+                for i in range(
+                    (
+                        (damaged_range["end"] - timedelta(hours=1)).date()
+                        - damaged_range["start"].date()
+                    ).days
+                    + 1
+                )
+            }
+        )
+        LOGGER.info(
+            "Repairing %d damaged ranges of %s, fetching %d days",
+            len(damaged_ranges),
+            meter_data.statistic_id,
+            len(days),
+        )
+        hourly_consumptions = await _async_fetch_days(action, meter_data, days)
+        # duplicate and misaligned hours are left out of the running sums
+        rows = await _async_stream_import(
+            coordinator, action, meter_data, hourly_consumptions, overwrite=True
+        )
+        coordinator.digests.update(meter_data, hourly_consumptions)
+
+    # check the repaired statistics all over again on the next run
+    coordinator.integrity.reset(meter_data)
+    LOGGER.info("Finished repairing statistics for %s", meter_data.statistic_id)
+    return rows or 0
+
+
+async def async_export_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+) -> int:
+    """
+    Export a meter's recorded hourly consumptions to a compressed columnar file.
+
+    Return the number of rows exported.
+    """
+    with coordinator.metrics.action("export_statistics") as action:
+        # get meter's old statistics
+        _, statistics_df = await _async_get_statistics(coordinator, action, meter_data)
+        if statistics_df.empty:
+            LOGGER.error("No statistics found for %s", meter_data.statistic_id)
+            return 0
+
+        path = get_export_path(coordinator.hass, meter_data)
+        with action.phase("export") as phase:
+            await coordinator.hass.async_add_executor_job(
+                _write_export, path, meter_data.unit, statistics_df
+            )
+            phase.rows += len(statistics_df)
+
+    LOGGER.info(
+        "Exported %d statistics for %s to %s",
+        len(statistics_df),
+        meter_data.statistic_id,
+        path,
+    )
+    return len(statistics_df)
+
+
+async def async_restore_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    meter_data: HAUSMSMeterData,
+) -> int:
+    """
+    Import a meter's exported hourly consumptions, without going through the portal.
+
+    The exported consumptions replace the recorded statistics of the same hours, and
+    the running sums are updated from there on, a month at a time. Return the number of
+    statistics rows written.
+    """
+    with coordinator.metrics.action("restore_statistics") as action:
+        path = get_export_path(coordinator.hass, meter_data)
+        with action.phase("export_read") as phase:
+            hourly_consumptions = await coordinator.hass.async_add_executor_job(
+                _read_export, path, meter_data.unit
+            )
+            phase.rows += len(hourly_consumptions)
+
+        rows = await _async_stream_import(
+            coordinator, action, meter_data, hourly_consumptions, overwrite=True
+        )
+        coordinator.digests.update(meter_data, hourly_consumptions)
+
+    LOGGER.info("Finished restoring statistics for %s from %s", meter_data.name, path)
+    return rows or 0
+
+
+async def async_get_new_cost_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    statistics_df: pd.DataFrame,
+    start: datetime | None = None,
+) -> list:
+    """
+    Return the meter's cost statistics that are new or changed.
+
+    Tiers start over every calendar month, so only the costs from the month of the
+    given start, the first changed consumption, are calculated again, carrying on the
+    running sum from the last recorded cost before it. They are compared against the
+    recorded cost statistics of the same months, so only the changed rows need
+    importing. Without a start, or any cost recorded before it, all costs are.
+    """
+    tariff = get_tariff(meter_data.type)
+    if tariff is None:
+        return []
+
+    hass = coordinator.hass
+    month_start = get_month_start(start) if start is not None else None
+    last_cost_sum = None
+    with action.phase("recorder_read") as phase:
+        if month_start is not None:
+            last_cost_sum = await get_last_statistic_sum(
+                hass, meter_data.cost_statistic_id, month_start
+            )
+            if last_cost_sum is None:
+                month_start = None
+        old_cost_statistics = await get_sensor_statistics(
+            hass, meter_data.cost_statistic_id, month_start
+        )
+        phase.rows += len(old_cost_statistics)
+
+    with action.phase("cost") as phase:
+        states = statistics_df["state"]
+        if month_start is not None:
+            states = states[states.index >= month_start]
+        old_cost_statistics_df = statistics_to_dataframe(old_cost_statistics)
+        cost_statistics_df = costs_to_statistics_dataframe(
+            calculate_hourly_costs(states, tariff), last_cost_sum or 0.0
+        )
+        # get new cost statistics only
+        new_cost_statistics = dataframe_to_statistics(
+            dataframe_diff(old_cost_statistics_df, cost_statistics_df)
+        )
+        phase.rows += len(new_cost_statistics)
+    return new_cost_statistics
+
+
+def _write_export(path: Path, unit: str, statistics_df: pd.DataFrame) -> None:
+    """Write the hourly consumptions of a statistics DataFrame to a file, in columns."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    with temp_path.open("wb") as file:
+        np.savez_compressed(
+            file,
+            start=statistics_df.index.as_unit("s").asi8,
+            state=statistics_df["state"].to_numpy(dtype=float),
+            unit=np.array(unit),
+        )
+    # only replace an earlier export once the new one is complete
+    temp_path.replace(path)
+
+
+def _read_export(path: Path, unit: str) -> pd.Series:
+    """Read the hourly consumptions written by _write_export."""
+    if not path.is_file():
+        raise HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="export_not_found",
+            translation_placeholders={"path": str(path)},
+        )
+
+    with np.load(path, allow_pickle=False) as export:
+        if str(export["unit"]) != unit:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="export_unit_mismatch",
+                translation_placeholders={
+                    "path": str(path),
+                    "unit": str(export["unit"]),
+                    "expected": unit,
+                },
+            )
+        index = pd.to_datetime(export["start"], unit="s", utc=True)
+        return pd.Series(
+            export["state"],
+            index=index.tz_convert(BRUNEI_TZ),
+            name="state",
+        )
+
+
+async def _async_fetch_days(
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    days: list[datetime],
+) -> pd.Series:
+    """Fetch and combine the hourly consumptions of the given days."""
+    consumptions = new_consumptions_dataframe(meter_data.unit, "h")[meter_data.unit]
+    for day in days:
+        with action.phase("day_fetch") as phase:
+            day_consumptions = await meter_data.fetch_hourly_consumptions(day)
+            phase.rows += len(day_consumptions)
+        consumptions = day_consumptions.combine_first(consumptions)
+    return consumptions
+
+
+async def _async_forget_incomplete_days(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    start: datetime,
+    end: datetime,
+) -> None:
+    """Forget the digests of the days from start until end missing recorded hours."""
+    incomplete_days = []
+    async for window_start, window_end, statistics in action.iter_phase(
+        "recorder_read",
+        iter_sensor_statistics(coordinator.hass, meter_data.statistic_id, start, end),
+        lambda window: len(window[2]),
+    ):
+        with action.phase("transform"):
+            incomplete_days += get_incomplete_days(
+                statistics_to_dataframe(statistics),
+                max(window_start, start),
+                min(window_end, end),
+            )
+    coordinator.digests.forget(meter_data, incomplete_days)
+
+
+def _filter_changed_days(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    consumptions: pd.Series,
+) -> pd.Series:
+    """Return only the consumptions of days that changed since they were imported."""
+    with action.phase("digest") as phase:
+        changed_consumptions = coordinator.digests.filter_changed(
+            meter_data, consumptions
+        )
+        phase.rows += len(consumptions)
+    LOGGER.debug(
+        "Skipping %d unchanged hours of %s",
+        len(consumptions.dropna()) - len(changed_consumptions),
+        meter_data.statistic_id,
+    )
+    return changed_consumptions
+
+
+async def _async_get_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+) -> tuple[list, pd.DataFrame]:
+    """Return the meter's recorded statistics, as is and as a DataFrame."""
+    with action.phase("recorder_read") as phase:
+        statistics = await get_sensor_statistics(
+            coordinator.hass,
+            meter_data.statistic_id,
+        )
+        phase.rows += len(statistics)
+    with action.phase("transform"):
+        return statistics, statistics_to_dataframe(statistics)
+
+
+def _merge_consumptions(
+    old_statistics_df: pd.DataFrame,
+    consumptions: pd.Series | None,
+    initial_sum: float,
+    *,
+    overwrite: bool,
+) -> pd.DataFrame:
+    """
+    Return recorded statistics merged with hourly consumptions, with running sums.
+
+    Hours missing from the recorded statistics are taken from the consumptions, or with
+    overwrite, the consumptions replace the recorded hours too. Duplicate and misaligned
+    hours are left out, and the sums carried on from the initial sum.
+    """
+    temp_statistics_df = old_statistics_df.copy()
+    if consumptions is not None and not consumptions.empty:
+        consumptions_df = consumptions_series_to_dataframe(consumptions)
+        temp_statistics_df = (
+            consumptions_df.combine_first(temp_statistics_df)
+            if overwrite
+            else temp_statistics_df.combine_first(consumptions_df)
+        )
+    temp_statistics_df = temp_statistics_df[
+        ~temp_statistics_df.index.duplicated(keep="last")
+        & (to_epoch_seconds(temp_statistics_df.index) % SECONDS_PER_HOUR == 0)
+    ]
+    temp_statistics_df["sum"] = cumulative_sum(temp_statistics_df["state"], initial_sum)
+    return temp_statistics_df
+
+
+def _async_import_statistics(
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    statistics: list,
+    cost_statistics: list,
+) -> None:
+    """Hand the given statistics and cost statistics to the recorder's queue."""
+    with action.phase("import") as phase:
+        if statistics:
+            async_import_statistics(coordinator.hass, meter_data.metadata, statistics)
+        if cost_statistics:
+            async_add_external_statistics(
+                coordinator.hass, meter_data.cost_metadata, cost_statistics
+            )
+        phase.rows += len(statistics) + len(cost_statistics)
+
+
+async def _async_stream_import(  # noqa: PLR0913
+    coordinator: HAUSMSDataUpdateCoordinator,
+    action: HAUSMSActionMetrics,
+    meter_data: HAUSMSMeterData,
+    consumptions: pd.Series | None = None,
+    start: datetime | None = None,
+    *,
+    overwrite: bool = False,
+) -> int | None:
+    """
+    Fill in and re-sum a meter's recorded statistics a month at a time.
+
+    Hours missing from the recorded statistics are taken from the given consumptions,
+    or with overwrite, the consumptions replace the recorded hours too. The running
+    sums of the consumptions and their costs are carried from month to month, so only
+    a month of statistics is held at a time, and every month's changed rows are
+    imported as it goes. Rows before the start are summed but not written.
+
+    Return the number of statistics rows written, or None without any statistics.
+    """
+    hass = coordinator.hass
+    start_time = await get_first_statistic_start(hass, meter_data.statistic_id)
+    if consumptions is not None and not consumptions.empty:
+        consumptions_start = consumptions.index.min().to_pydatetime()
+        start_time = min(start_time or consumptions_start, consumptions_start)
+    if start_time is None:
+        return None
+
+    tariff = get_tariff(meter_data.type)
+    # the only state carried from month to month
+    last_sum = last_cost_sum = 0.0
+    rows = 0
+    async for window_start, window_end, statistics in action.iter_phase(
+        "recorder_read",
+        iter_sensor_statistics(hass, meter_data.statistic_id, start_time),
+        lambda window: len(window[2]),
+    ):
+        with action.phase("transform"):
+            old_statistics_df = statistics_to_dataframe(statistics)
+            # merge in the month's consumptions, summing on from last month's
+            temp_statistics_df = _merge_consumptions(
+                old_statistics_df,
+                consumptions[
+                    (consumptions.index >= window_start)
+                    & (consumptions.index < window_end)
+                ]
+                if consumptions is not None
+                else None,
+                last_sum,
+                overwrite=overwrite,
+            )
+            if temp_statistics_df.empty:
+                continue
+            last_sum = float(temp_statistics_df["sum"].dropna().iloc[-1])
+            # get new statistics only
+            new_statistics_df = dataframe_diff(old_statistics_df, temp_statistics_df)
+            if start is not None:
+                new_statistics_df = new_statistics_df[new_statistics_df.index >= start]
+            new_statistics = dataframe_to_statistics(new_statistics_df)
+
+        new_cost_statistics = []
+        if tariff is not None:
+            with action.phase("recorder_read") as phase:
+                old_cost_statistics = await get_sensor_statistics(
+                    hass,
+                    meter_data.cost_statistic_id,
+                    max(window_start, start_time),
+                    window_end,
+                )
+                phase.rows += len(old_cost_statistics)
+            with action.phase("cost") as phase:
+                # windows are calendar months, just like the tariff's tiers
+                cost_statistics_df = costs_to_statistics_dataframe(
+                    calculate_hourly_costs(temp_statistics_df["state"], tariff),
+                    last_cost_sum,
+                )
+                last_cost_sum = float(cost_statistics_df["sum"].iloc[-1])
+                new_cost_statistics_df = dataframe_diff(
+                    statistics_to_dataframe(old_cost_statistics), cost_statistics_df
+                )
+                if start is not None:
+                    new_cost_statistics_df = new_cost_statistics_df[
+                        new_cost_statistics_df.index >= start
+                    ]
+                new_cost_statistics = dataframe_to_statistics(new_cost_statistics_df)
+                phase.rows += len(new_cost_statistics)
+
+        # imported a month at a time, so the recorder's queue never holds more
+        _async_import_statistics(
+            coordinator, action, meter_data, new_statistics, new_cost_statistics
+        )
+        rows += len(new_statistics)
+    return rows
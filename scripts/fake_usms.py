@@ -0,0 +1,332 @@
+# ruff: noqa: INP001
+"""
+Local stand-in for the USMS portal, for offline load and soak testing.
+
+The portal is served through an `httpx.MockTransport`, so any `httpx.AsyncClient`
+built with `FakeUSMSPortal.transport` talks to it instead of https://www.usms.com.bn/.
+It only emulates as much of the portal as `usms` needs: the login flow, the account
+page with its meter cards, and the hourly/daily usage history reports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+
+import httpx
+from usms import BRUNEI_TZ
+
+SESSION_EXPIRED_PAGE = "Your Session Has Expired, Please Login Again."
+HISTORY_NOT_FOUND = "consumption history not found."
+
+ASP_STATE = (
+    '<input type="hidden" name="__VIEWSTATE" value="{state}" />'
+    '<input type="hidden" name="__EVENTVALIDATION" value="{state}" />'
+)
+
+
+@dataclass
+class FakeUSMSPortalConfig:
+    """Knobs for the fake portal's accounts, data and failure injection."""
+
+    username: str = "loadtest"
+    password: str = "loadtest"  # noqa: S105
+
+    electric_meters: int = 1
+    water_meters: int = 0
+    history_days: int = 365
+    seed: int = 0
+
+    # hours between the last reading and now, as reported by the meter cards
+    update_lag_hours: int = 2
+    # how long a login session stays valid, None for forever
+    session_ttl: float | None = None
+
+    # fixed latency added to every request, plus up to `jitter` seconds on top
+    latency: float = 0.0
+    jitter: float = 0.0
+    # probability of a request failing with a HTTP 500 error page
+    error_rate: float = 0.0
+    # probability of a request timing out (httpx.ReadTimeout)
+    timeout_rate: float = 0.0
+    # requests per second before the portal starts answering with HTTP 429
+    rate_limit: float | None = None
+    # probability of a past day being served with its last few hours missing
+    partial_day_rate: float = 0.0
+
+
+@dataclass
+class FakeUSMSMeter:
+    """A meter served by the fake portal."""
+
+    no: str
+    unit: str
+    base: float
+
+    remaining_unit: float = 1000.0
+    remaining_credit: float = 100.0
+
+    def hourly_consumptions(self, date: datetime, seed: int) -> list[float]:
+        """Return the deterministic 24 hourly consumptions of a given day."""
+        digest = hashlib.blake2b(
+            f"{seed}:{self.no}:{date.date().isoformat()}".encode(),
+            digest_size=8,
+        ).digest()
+        rng = random.Random(int.from_bytes(digest))  # noqa: S311
+        return [round(self.base * rng.uniform(0.2, 1.8), 3) for _ in range(24)]
+
+
+@dataclass
+class FakeUSMSPortal:
+    """An in-memory USMS portal, served through an httpx.MockTransport."""
+
+    config: FakeUSMSPortalConfig = field(default_factory=FakeUSMSPortalConfig)
+
+    requests: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    logins: int = 0
+
+    def __post_init__(self) -> None:
+        """Create the meters and the internal session state."""
+        self.meters: list[FakeUSMSMeter] = [
+            FakeUSMSMeter(no=f"{10000000 + i}", unit="kWh", base=1.5)
+            for i in range(self.config.electric_meters)
+        ] + [
+            FakeUSMSMeter(no=f"{20000000 + i}", unit="m³", base=0.05)
+            for i in range(self.config.water_meters)
+        ]
+        self._sessions: dict[str, float] = {}
+        self._pending_sigs: set[str] = set()
+        self._request_times: list[float] = []
+        self._rng = random.Random(self.config.seed)  # noqa: S311
+        self._published = 0
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        """Return a transport to build an httpx.AsyncClient against this portal."""
+        return httpx.MockTransport(self.handle_request)
+
+    @property
+    def total_requests(self) -> int:
+        """Return the total number of requests served so far."""
+        return sum(self.requests.values())
+
+    def now(self) -> datetime:
+        """Return the current time in the portal's timezone."""
+        return datetime.now(tz=BRUNEI_TZ)
+
+    def last_update(self) -> datetime:
+        """Return the time of the last reading shown on the meter cards."""
+        last_update = self.now() - timedelta(hours=self.config.update_lag_hours)
+        return last_update.replace(microsecond=0) + timedelta(seconds=self._published)
+
+    def publish_update(self) -> None:
+        """Publish a new reading, so the next account refresh finds new updates."""
+        self._published += 1
+
+    def earliest_date(self) -> datetime:
+        """Return the first day with consumption history."""
+        today = self.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=self.config.history_days)
+
+    def get_meter(self, meter_id: str) -> FakeUSMSMeter | None:
+        """Return the meter for a given base64 encoded meter id."""
+        for meter in self.meters:
+            if base64.b64encode(meter.no.encode()).decode() == meter_id:
+                return meter
+        return None
+
+    async def handle_request(self, request: httpx.Request) -> httpx.Response:  # noqa: PLR0911
+        """Serve a single request, with latency and failure injection."""
+        path = request.url.path.removeprefix("/SmartMeter/").lstrip("/")
+        self.requests[f"{request.method} {path}"] += 1
+
+        if self.config.latency or self.config.jitter:
+            await asyncio.sleep(
+                self.config.latency + self._rng.uniform(0, self.config.jitter)
+            )
+
+        if self._is_throttled():
+            self.errors["throttled"] += 1
+            return httpx.Response(429, text="Too Many Requests")
+        if self._rng.random() < self.config.timeout_rate:
+            self.errors["timeout"] += 1
+            msg = f"Fake USMS portal timed out on {path}"
+            raise httpx.ReadTimeout(msg, request=request)
+        if self._rng.random() < self.config.error_rate:
+            self.errors["server_error"] += 1
+            return httpx.Response(500, text="Internal Server Error")
+
+        if path == "ResLogin":
+            return self._handle_login(request)
+        if path == "LoginSession.aspx":
+            return self._handle_login_session(request)
+
+        if not self._is_authenticated(request):
+            return _page(SESSION_EXPIRED_PAGE)
+
+        if path in ("Home", "AccountInfo"):
+            return _page(self._render_account())
+        if path == "Report/UsageHistory":
+            return self._handle_usage_history(request)
+
+        return httpx.Response(404, text="Not Found")
+
+    def _is_throttled(self) -> bool:
+        """Return True if the request exceeds the configured rate limit."""
+        if self.config.rate_limit is None:
+            return False
+
+        now = time.monotonic()
+        self._request_times = [t for t in self._request_times if now - t < 1]
+        if len(self._request_times) >= self.config.rate_limit:
+            return True
+        self._request_times.append(now)
+        return False
+
+    def _is_authenticated(self, request: httpx.Request) -> bool:
+        """Return True if the request carries a valid session cookie."""
+        cookies = request.headers.get("cookie", "")
+        for cookie in cookies.split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name != "ASP.NET_SessionId" or value not in self._sessions:
+                continue
+            created = self._sessions[value]
+            ttl = self.config.session_ttl
+            return ttl is None or time.monotonic() - created < ttl
+        return False
+
+    def _handle_login(self, request: httpx.Request) -> httpx.Response:
+        """Serve the login page, and handle the submitted login form."""
+        if request.method == "GET":
+            return _page("")
+
+        form = parse_qs(request.content.decode())
+        username = form.get("ASPxRoundPanel1$txtUsername", [""])[0]
+        password = form.get("ASPxRoundPanel1$txtPassword", [""])[0]
+        if (username, password) != (self.config.username, self.config.password):
+            return _page('<span id="pcErr_lblErrMsg">Invalid login.</span>')
+
+        self.logins += 1
+        session_id = secrets.token_hex(12)
+        sig = secrets.token_hex(8)
+        self._pending_sigs.add(sig)
+        self._sessions[session_id] = time.monotonic()
+        return httpx.Response(
+            302,
+            headers={
+                "location": f"LoginSession.aspx?pLoginName={username}&Sig={sig}",
+                "set-cookie": f"ASP.NET_SessionId={session_id}; path=/",
+            },
+        )
+
+    def _handle_login_session(self, request: httpx.Request) -> httpx.Response:
+        """Serve the redirect that establishes an authenticated session."""
+        sig = request.url.params.get("Sig", "")
+        if sig in self._pending_sigs:
+            return httpx.Response(302, headers={"location": "Home"})
+        return _page(SESSION_EXPIRED_PAGE)
+
+    def _render_account(self) -> str:
+        """Render the account page with one card per meter."""
+        last_update = self.last_update().strftime("%d/%m/%Y %H:%M:%S")
+        cards = "".join(
+            "<td class='dxcvCard'><table>"
+            + _card_field("2", meter.no)
+            + _card_field("5", "ACTIVE")
+            + _card_field("6", "1 Jalan Loadtest")
+            + _card_field("7", "Kampong Loadtest")
+            + _card_field("8", "Mukim Loadtest")
+            + _card_field("9", "Brunei Muara")
+            + _card_field("10", "BA1111")
+            + _card_field("11", f"{meter.remaining_unit:,.2f} {meter.unit}")
+            + _card_field("12", f"${meter.remaining_credit:,.2f}")
+            + _card_field("17", last_update)
+            + "</table></td>"
+            for meter in self.meters
+        )
+        name = "<td id='ASPxCardView1_DXCardLayout0_4'><span></span>Loadtest</td>"
+        return f"<table><tr>{name}</tr><tr>{cards}</tr></table>"
+
+    def _handle_usage_history(self, request: httpx.Request) -> httpx.Response:
+        """Serve the hourly (max 1 day) and daily (max 1 month) usage reports."""
+        meter = self.get_meter(request.url.params.get("p", ""))
+        if meter is None:
+            return httpx.Response(404, text="Not Found")
+
+        form = parse_qs(request.content.decode()) if request.method == "POST" else {}
+        report_type = form.get("cboType_VI", [""])[0]
+        date_from = form.get("cboDateFrom", [""])[0]
+        if not date_from:
+            return _page("")
+
+        date = datetime.strptime(date_from, "%d/%m/%Y").replace(tzinfo=BRUNEI_TZ)
+        if report_type == "3":
+            values = self._hourly_values(meter, date)
+            # hourly rows are labelled by the hour they end on, starting from 1
+            first_row = 1
+        else:
+            values = self._daily_values(meter, date)
+            first_row = 0
+
+        if not values:
+            return _page(f'<span id="pcErr_lblErrMsg">{HISTORY_NOT_FOUND}</span>')
+
+        rows = "".join(
+            f"<tr id='ASPxPageControl1_grid_DXDataRow{i + first_row}'>"
+            f"<td>{i + first_row}</td><td>{value}</td></tr>"
+            for i, value in enumerate(values)
+        )
+        return _page(f"<table>{rows}</table>")
+
+    def _hourly_values(self, meter: FakeUSMSMeter, date: datetime) -> list[float]:
+        """Return the hourly consumptions of a day, as much as is available."""
+        if date < self.earliest_date():
+            return []
+
+        values = meter.hourly_consumptions(date, self.config.seed)
+        last_update = self.last_update()
+        if date.date() == last_update.date():
+            return values[: last_update.hour]
+        if date.date() > last_update.date():
+            return []
+        if self._rng.random() < self.config.partial_day_rate:
+            return values[: self._rng.randint(1, 23)]
+        return values
+
+    def _daily_values(self, meter: FakeUSMSMeter, date: datetime) -> list[float]:
+        """Return the daily consumptions of a month, up until yesterday."""
+        values = []
+        day = date.replace(day=1)
+        yesterday = self.last_update().date() - timedelta(days=1)
+        while day.month == date.month and day.date() <= yesterday:
+            if day >= self.earliest_date():
+                total = sum(meter.hourly_consumptions(day, self.config.seed))
+                values.append(round(total, 3))
+            day += timedelta(days=1)
+        return values
+
+
+def _card_field(field_id: str, value: str) -> str:
+    """Render a single labelled field of a meter card."""
+    return (
+        f"<tr><td id='ASPxCardView1_DXCardLayout0_{field_id}'></td>"
+        f"<td class='dxflNestedControlCell'>{value}</td></tr>"
+    )
+
+
+def _page(body: str) -> httpx.Response:
+    """Return a HTML page with a fresh ASP.net state."""
+    state = ASP_STATE.format(state=secrets.token_hex(8))
+    return httpx.Response(
+        200,
+        html=f"<html><body><form>{state}{body}</form></body></html>",
+    )
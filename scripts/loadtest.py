@@ -0,0 +1,284 @@
+# ruff: noqa: INP001, T201
+"""
+Load and soak test HA-USMS against a local fake USMS portal.
+
+Boots a minimal Home Assistant instance in a temporary config directory, with the
+recorder and this integration set up against `FakeUSMSPortal`, then drives the
+coordinator (and optionally the buttons) and reports poll latency, request counts
+and throughput. Run through `scripts/loadtest --help`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+import httpx
+from fake_usms import FakeUSMSPortal, FakeUSMSPortalConfig
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_SCAN_INTERVAL, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import httpx_client, recorder
+from homeassistant.helpers import issue_registry as ir
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DOMAIN = "ha_usms"
+EPOCH = datetime.fromtimestamp(0).astimezone()
+
+BUTTONS = {
+    "download": "Download Statistics",
+    "recalculate": "Recalculate Statistics",
+    "missing": "Download Missing Statistics",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--polls", type=int, default=10, help="coordinator polls")
+    parser.add_argument(
+        "--buttons",
+        nargs="*",
+        choices=BUTTONS,
+        default=[],
+        help="buttons to press on every meter, after the polls",
+    )
+    parser.add_argument(
+        "--force-update",
+        action="store_true",
+        help="publish a new reading and make the account due for an update every poll",
+    )
+    parser.add_argument(
+        "--expire-cache",
+        action="store_true",
+        help="drop usms' cached consumptions every poll, as if polls were far apart",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        default=0,
+        help="profile this many polls or button presses, and print the summaries",
+    )
+    parser.add_argument("--debug", action="store_true", help="enable debug logging")
+
+    portal = parser.add_argument_group("fake portal")
+    for portal_field in fields(FakeUSMSPortalConfig):
+        if portal_field.name in ("username", "password"):
+            continue
+        default = portal_field.default
+        portal.add_argument(
+            f"--{portal_field.name.replace('_', '-')}",
+            type=float if isinstance(default, float) or default is None else int,
+            default=default,
+        )
+    return parser.parse_args()
+
+
+async def async_start_hass(config_dir: Path, portal: FakeUSMSPortal) -> HomeAssistant:
+    """Start a minimal Home Assistant instance, using the fake portal for httpx."""
+    (config_dir / "custom_components").mkdir()
+    (config_dir / "custom_components" / DOMAIN).symlink_to(
+        REPO_DIR / "custom_components" / DOMAIN
+    )
+
+    hass = HomeAssistant(str(config_dir))
+    hass.config.skip_pip = True
+    await hass.config.async_set_time_zone("Asia/Brunei")
+    loader.async_setup(hass)
+    await asyncio.gather(
+        ar.async_load(hass),
+        dr.async_load(hass),
+        er.async_load(hass),
+        ir.async_load(hass),
+    )
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    recorder.async_initialize_recorder(hass)
+
+    # every account creates an httpx client of its own, talking to the fake portal
+    httpx_client.create_async_httpx_client = lambda _hass, **kwargs: (
+        httpx.AsyncClient(transport=portal.transport, **kwargs)
+    )
+
+    await hass.async_start()
+    return hass
+
+
+async def async_add_entry(hass: HomeAssistant, portal: FakeUSMSPortal) -> ConfigEntry:
+    """Add and set up a config entry for the fake portal's account."""
+    entry = ConfigEntry(
+        data={
+            CONF_USERNAME: portal.config.username,
+            CONF_PASSWORD: portal.config.password,
+        },
+        discovery_keys=MappingProxyType({}),
+        domain=DOMAIN,
+        minor_version=1,
+        # keep Home Assistant from polling on its own, the harness drives the polls
+        options={CONF_SCAN_INTERVAL: 365 * 24 * 60 * 60},
+        source="user",
+        subentries_data=None,
+        title=f"USMS Account {portal.config.username}",
+        unique_id=portal.config.username,
+        version=1,
+    )
+    await hass.config_entries.async_add(entry)
+    await async_wait(hass)
+    return entry
+
+
+async def async_wait(hass: HomeAssistant) -> None:
+    """Wait for Home Assistant and the recorder to finish any pending work."""
+    await hass.async_block_till_done()
+    await recorder.get_instance(hass).async_block_till_done()
+
+
+def report(name: str, durations: list[float], requests: list[int]) -> None:
+    """Print latency and request count figures for a set of runs."""
+    if not durations:
+        return
+    total = sum(durations)
+    print(f"{name}:")
+    print(f"  runs:       {len(durations)}")
+    print(
+        "  latency:    "
+        f"min {min(durations):.3f}s, "
+        f"median {statistics.median(durations):.3f}s, "
+        f"max {max(durations):.3f}s"
+    )
+    print(
+        "  requests:   "
+        f"total {sum(requests)}, "
+        f"per run {statistics.mean(requests):.1f}, "
+        f"throughput {sum(requests) / total if total else 0:.1f} req/s"
+    )
+
+
+def report_summary(
+    coordinator: Any,
+    portal: FakeUSMSPortal,
+    config_dir: Path,
+) -> None:
+    """Print the last poll's phases, any profiles, and the portal's counters."""
+    if coordinator.metrics.last_poll is not None:
+        print("last poll phases:")
+        for phase in coordinator.metrics.last_poll.phases.values():
+            print(
+                f"  {phase.name:<16}{phase.duration:>8.3f}s"
+                f"{phase.requests:>8} requests{phase.rows:>8} rows"
+            )
+    for summary in sorted(config_dir.glob(f"{DOMAIN}_profile_*.txt")):
+        print(f"profile {summary.name}:")
+        print(summary.read_text())
+    print(f"logins: {portal.logins}")
+    print(f"injected errors: {dict(portal.errors)}")
+    print("requests by endpoint:")
+    for endpoint, count in portal.requests.most_common():
+        print(f"  {count:>8}  {endpoint}")
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    """Run the load test."""
+    portal = FakeUSMSPortal(
+        FakeUSMSPortalConfig(
+            **{
+                portal_field.name: getattr(args, portal_field.name)
+                for portal_field in fields(FakeUSMSPortalConfig)
+                if portal_field.name not in ("username", "password")
+            }
+        )
+    )
+
+    with tempfile.TemporaryDirectory(prefix="ha_usms_loadtest_") as config_dir:
+        hass = await async_start_hass(Path(config_dir), portal)
+        try:
+            started = time.perf_counter()
+            entry = await async_add_entry(hass, portal)
+            setup_duration = time.perf_counter() - started
+            if not hasattr(entry, "runtime_data"):
+                print(f"Setup failed, config entry is {entry.state}")
+                return 1
+            report("setup", [setup_duration], [portal.total_requests])
+
+            coordinator = entry.runtime_data.coordinator
+            if args.profile:
+                await hass.services.async_call(
+                    DOMAIN, "profile", {"count": args.profile}, blocking=True
+                )
+
+            durations, requests, failures = [], [], 0
+            for _ in range(args.polls):
+                if args.force_update:
+                    coordinator.account.last_refresh = EPOCH
+                    portal.publish_update()
+                if args.expire_cache:
+                    for meter in coordinator.account.meters:
+                        meter.hourly_consumptions = meter.hourly_consumptions.iloc[0:0]
+                        meter.daily_consumptions = meter.daily_consumptions.iloc[0:0]
+                before = portal.total_requests
+                started = time.perf_counter()
+                await coordinator.async_refresh()
+                await async_wait(hass)
+                durations.append(time.perf_counter() - started)
+                requests.append(portal.total_requests - before)
+                failures += not coordinator.last_update_success
+            report("polls", durations, requests)
+            if failures:
+                print(f"  failures:   {failures}")
+
+            entity_registry = er.async_get(hass)
+            button_component = hass.data["entity_components"]["button"]
+            for button in args.buttons:
+                durations, requests = [], []
+                for meter_data in coordinator.data:
+                    entity_id = entity_registry.async_get_entity_id(
+                        "button",
+                        DOMAIN,
+                        f"{meter_data.unique_id}_{BUTTONS[button]}".lower().replace(
+                            " ", "_"
+                        ),
+                    )
+                    entity = button_component.get_entity(entity_id)
+                    before = portal.total_requests
+                    started = time.perf_counter()
+                    await entity.async_press()
+                    await async_wait(hass)
+                    durations.append(time.perf_counter() - started)
+                    requests.append(portal.total_requests - before)
+                report(f"button {button}", durations, requests)
+
+            report_summary(coordinator, portal, Path(config_dir))
+        finally:
+            await hass.async_stop(force=True)
+    return 0
+
+
+def main() -> int:
+    """Entry point."""
+    args = parse_args()
+    # usms parses the portal's timestamps as local time, so run as a Brunei server would
+    os.environ["TZ"] = "Asia/Brunei"
+    time.tzset()
+    level = logging.DEBUG if args.debug else logging.WARNING
+    logging.basicConfig(level=level)
+    logging.getLogger("usms").setLevel(level)
+    return asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
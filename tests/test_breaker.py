@@ -0,0 +1,133 @@
+"""Tests for the circuit breaker guarding requests to the USMS portal."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.ha_usms import breaker as breaker_module
+from custom_components.ha_usms.breaker import (
+    PROBE_TIMEOUT,
+    HAUSMSBackoffPolicy,
+    HAUSMSBreakerState,
+    HAUSMSCircuitBreaker,
+    HAUSMSCircuitOpenError,
+    HAUSMSFailureKind,
+)
+
+POLICIES = {
+    HAUSMSFailureKind.AUTH: HAUSMSBackoffPolicy(1, 100, 1000),
+    HAUSMSFailureKind.TIMEOUT: HAUSMSBackoffPolicy(2, 100, 1000),
+    HAUSMSFailureKind.SERVER: HAUSMSBackoffPolicy(3, 100, 250),
+}
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start the clock."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the breaker's clock, and take the jitter out of its delays."""
+    clock = FakeClock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock)
+    # always keep the full delay
+    monkeypatch.setattr(breaker_module.random, "uniform", lambda _a, b: b)
+    return clock
+
+
+def _open(breaker: HAUSMSCircuitBreaker) -> None:
+    """Open a closed breaker with server failures."""
+    for _ in range(3):
+        breaker.before_request()
+        breaker.record_failure(HAUSMSFailureKind.SERVER)
+
+
+@pytest.mark.usefixtures("clock")
+def test_opens_at_each_kinds_threshold() -> None:
+    """Each kind of failure opens the breaker at its own threshold."""
+    breaker = HAUSMSCircuitBreaker(POLICIES)
+
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    breaker.record_failure(HAUSMSFailureKind.TIMEOUT)
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    assert breaker.state is HAUSMSBreakerState.CLOSED
+    breaker.before_request()
+
+    breaker.record_failure(HAUSMSFailureKind.TIMEOUT)
+    assert breaker.state is HAUSMSBreakerState.OPEN
+    assert breaker.is_open
+    assert breaker.retry_in == 100
+    with pytest.raises(HAUSMSCircuitOpenError) as error:
+        breaker.before_request()
+    assert error.value.retry_in == 100
+
+
+@pytest.mark.usefixtures("clock")
+def test_success_resets_the_failures() -> None:
+    """Failures only open the breaker if they are consecutive."""
+    breaker = HAUSMSCircuitBreaker(POLICIES)
+
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    breaker.record_success()
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+
+    assert breaker.state is HAUSMSBreakerState.CLOSED
+
+
+def test_half_open_lets_a_single_probe_through(clock: FakeClock) -> None:
+    """After the delay, only one request probes the portal, the others fail fast."""
+    breaker = HAUSMSCircuitBreaker(POLICIES)
+    _open(breaker)
+
+    clock.now += 100
+    breaker.before_request()
+    assert breaker.state is HAUSMSBreakerState.HALF_OPEN
+    with pytest.raises(HAUSMSCircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state is HAUSMSBreakerState.CLOSED
+    breaker.before_request()
+
+
+def test_failed_probe_opens_again_for_longer(clock: FakeClock) -> None:
+    """A failed probe opens the breaker again, for twice as long, up to the max."""
+    breaker = HAUSMSCircuitBreaker(POLICIES)
+    _open(breaker)
+
+    clock.now += 100
+    breaker.before_request()
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    assert breaker.state is HAUSMSBreakerState.OPEN
+    assert breaker.retry_in == 200
+
+    clock.now += 200
+    breaker.before_request()
+    breaker.record_failure(HAUSMSFailureKind.SERVER)
+    assert breaker.retry_in == 250
+
+
+def test_probe_that_never_reports_back(clock: FakeClock) -> None:
+    """Another probe is let through once the last one has timed out."""
+    breaker = HAUSMSCircuitBreaker(POLICIES)
+    _open(breaker)
+
+    clock.now += 100
+    breaker.before_request()
+    clock.now += PROBE_TIMEOUT - 1
+    with pytest.raises(HAUSMSCircuitOpenError):
+        breaker.before_request()
+
+    clock.now += 1
+    breaker.before_request()
+    with pytest.raises(HAUSMSCircuitOpenError):
+        breaker.before_request()
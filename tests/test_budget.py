@@ -0,0 +1,93 @@
+"""Tests for the time budget of a poll."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.ha_usms import budget as budget_module
+from custom_components.ha_usms.budget import HAUSMSPollBudget
+
+
+class FakeClock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start the clock."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the budget's clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(budget_module.time, "monotonic", clock)
+    return clock
+
+
+async def _answer() -> int:
+    """Return at once."""
+    return 42
+
+
+async def _hang() -> None:
+    """Never return."""
+    await asyncio.Event().wait()
+
+
+def test_no_deadline() -> None:
+    """Without any seconds given, the budget never runs out."""
+    budget = HAUSMSPollBudget()
+
+    assert budget.remaining is None
+    assert not budget.expired
+    assert asyncio.run(budget.async_run(_answer)) == 42
+
+
+def test_remaining_runs_down_to_zero(clock: FakeClock) -> None:
+    """The seconds left run down with the clock, and never below zero."""
+    budget = HAUSMSPollBudget(10)
+
+    clock.now += 4
+    assert budget.remaining == 6
+    assert not budget.expired
+
+    clock.now += 20
+    assert budget.remaining == 0
+    assert budget.expired
+
+
+def test_expired_budget_runs_nothing(clock: FakeClock) -> None:
+    """Once the budget has run out, a job is refused before it starts."""
+    budget = HAUSMSPollBudget(10)
+    clock.now += 10
+    started = []
+
+    async def job() -> None:
+        """Record that the job started."""
+        started.append(True)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(budget.async_run(job))
+    assert started == []
+
+
+def test_job_within_budget() -> None:
+    """A job finishing in time returns its result."""
+    budget = HAUSMSPollBudget(10)
+
+    assert asyncio.run(budget.async_run(_answer)) == 42
+
+
+def test_job_over_budget_is_cancelled() -> None:
+    """A job still running at the deadline is cancelled with TimeoutError."""
+    budget = HAUSMSPollBudget(0.01)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(budget.async_run(_hang))
+    assert budget.expired
@@ -0,0 +1,127 @@
+"""Tests for the rolling hourly consumption buffer."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from usms import BRUNEI_TZ
+
+from custom_components.ha_usms import buffer as buffer_module
+from custom_components.ha_usms.buffer import HAUSMSConsumptionBuffer
+from custom_components.ha_usms.epoch import SECONDS_PER_HOUR
+
+if TYPE_CHECKING:
+    import pytest
+
+# 2026-10-19 00:00 in Brunei, 2026-10-18 16:00 in UTC
+MIDNIGHT = datetime(2026, 10, 19, tzinfo=BRUNEI_TZ)
+MIDNIGHT_HOUR = int(MIDNIGHT.timestamp()) // SECONDS_PER_HOUR
+
+
+def _set_now(monkeypatch: pytest.MonkeyPatch, hour: int) -> None:
+    """Make the current time halfway through the given hour since the epoch."""
+    monkeypatch.setattr(
+        buffer_module.time, "time", lambda: hour * SECONDS_PER_HOUR + 1800
+    )
+
+
+def test_empty_buffer() -> None:
+    """Nothing is known of an empty buffer."""
+    buffer = HAUSMSConsumptionBuffer()
+
+    assert len(buffer) == 0
+    assert buffer.last_hour is None
+    assert buffer.today is None
+    assert buffer.rolling_sum(7) is None
+    assert buffer.average_daily(7) is None
+
+
+def test_update_from_series() -> None:
+    """Consumptions are written by their hour, skipping missing ones."""
+    buffer = HAUSMSConsumptionBuffer()
+    consumptions = pd.Series(
+        [1.0, None, 2.0],
+        index=pd.date_range(MIDNIGHT, periods=3, freq="h"),
+    )
+
+    buffer.update(consumptions)
+
+    assert len(buffer) == 2
+    assert buffer.last_hour == MIDNIGHT.replace(hour=2)
+    assert buffer.rolling_sum(7) == 3.0
+
+
+def test_rolling_sums_drop_hours_leaving_the_window() -> None:
+    """Hours older than a window no longer count towards its sum."""
+    buffer = HAUSMSConsumptionBuffer()
+    buffer.set(MIDNIGHT_HOUR, 5.0)
+    buffer.set(MIDNIGHT_HOUR + 1, 1.0)
+
+    # 7 days later, the first hour has just left the 7 day window
+    buffer.set(MIDNIGHT_HOUR + 7 * 24, 2.0)
+
+    assert buffer.rolling_sum(7) == 3.0
+    assert buffer.rolling_sum(30) == 8.0
+    assert buffer.average_daily(7) == round(3.0 / 2 * 24, 3)
+
+
+def test_rewriting_an_hour_adjusts_the_sums() -> None:
+    """Writing an hour again replaces its consumption, instead of adding to it."""
+    buffer = HAUSMSConsumptionBuffer()
+    buffer.set(MIDNIGHT_HOUR, 5.0)
+    buffer.set(MIDNIGHT_HOUR + 1, 1.0)
+
+    buffer.set(MIDNIGHT_HOUR, 2.0)
+
+    assert len(buffer) == 2
+    assert buffer.rolling_sum(7) == 3.0
+
+
+def test_hours_older_than_the_buffer_are_skipped() -> None:
+    """Hours that no longer fit in the buffer are left out."""
+    buffer = HAUSMSConsumptionBuffer(days=7)
+    buffer.set(MIDNIGHT_HOUR, 1.0)
+
+    buffer.set(MIDNIGHT_HOUR - 7 * 24, 100.0)
+
+    assert buffer.rolling_sum(7) == 1.0
+    assert 30 not in buffer.windows
+
+
+def test_today_starts_at_brunei_midnight(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Today only counts the hours since midnight in Brunei, not in UTC."""
+    buffer = HAUSMSConsumptionBuffer()
+    buffer.set(MIDNIGHT_HOUR - 1, 4.0)
+    buffer.set(MIDNIGHT_HOUR, 1.0)
+    buffer.set(MIDNIGHT_HOUR + 1, 2.0)
+    _set_now(monkeypatch, MIDNIGHT_HOUR + 1)
+
+    assert buffer.today == 3.0
+
+
+def test_today_is_zero_until_an_hour_of_today_is_known(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """After midnight, yesterday's consumption is no longer today's."""
+    buffer = HAUSMSConsumptionBuffer()
+    buffer.set(MIDNIGHT_HOUR - 2, 4.0)
+    buffer.set(MIDNIGHT_HOUR - 1, 1.0)
+
+    _set_now(monkeypatch, MIDNIGHT_HOUR - 1)
+    assert buffer.today == 5.0
+
+    _set_now(monkeypatch, MIDNIGHT_HOUR)
+    assert buffer.today == 0.0
+
+
+def test_days_remaining() -> None:
+    """Remaining units last as long as the average daily consumption allows."""
+    buffer = HAUSMSConsumptionBuffer()
+    for hour in range(24):
+        buffer.set(MIDNIGHT_HOUR + hour, 0.5)
+
+    assert buffer.average_daily(7) == 12.0
+    assert buffer.days_remaining(60.0, 7) == 5.0
+    assert buffer.days_remaining(60.0, 14) is None
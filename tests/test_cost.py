@@ -0,0 +1,75 @@
+"""Tests for the tiered tariff cost calculation."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from usms import BRUNEI_TZ, TARIFFS
+
+from custom_components.ha_usms.cost import (
+    calculate_hourly_costs,
+    costs_to_statistics_dataframe,
+    get_tariff,
+)
+
+ELECTRIC_TARIFF = TARIFFS["ELECTRIC"]
+
+
+def _hourly(values: list[float], start: str = "2026-10-01 00:00") -> pd.Series:
+    """Return hourly consumptions from a start in Brunei time."""
+    return pd.Series(
+        values,
+        index=pd.date_range(start, periods=len(values), freq="h", tz=BRUNEI_TZ),
+        dtype=float,
+    )
+
+
+def test_get_tariff() -> None:
+    """Meter types are matched to tariffs the way usms does."""
+    assert get_tariff("Electricity") is ELECTRIC_TARIFF
+    assert get_tariff("Water") is TARIFFS["WATER"]
+    assert get_tariff("Gas") is None
+
+
+def test_hour_crossing_a_tier_boundary() -> None:
+    """An hour crossing a tier boundary is charged at both tiers' rates."""
+    costs = calculate_hourly_costs(_hourly([599, 2, 10]), ELECTRIC_TARIFF)
+
+    assert costs.tolist() == pytest.approx([5.99, 1 * 0.01 + 1 * 0.08, 10 * 0.08])
+
+
+def test_tiers_start_over_every_month_in_brunei_time() -> None:
+    """The first hour of a Brunei month is charged at the first tier again."""
+    # 2026-11-01 00:00 in Brunei is still October in UTC
+    costs = calculate_hourly_costs(
+        _hourly([700, 10], "2026-10-31 23:00"), ELECTRIC_TARIFF
+    )
+
+    assert costs.tolist() == pytest.approx([600 * 0.01 + 100 * 0.08, 10 * 0.01])
+
+
+def test_month_costs_add_up_to_the_tariff() -> None:
+    """The hourly costs of a month add up to the tariff's cost of its total."""
+    consumptions = _hourly([123.4, 0, 987.6, 55.5, 2500, 1.25])
+
+    costs = calculate_hourly_costs(consumptions, ELECTRIC_TARIFF)
+
+    assert costs.sum() == pytest.approx(
+        ELECTRIC_TARIFF.calculate_cost(consumptions.sum()), abs=0.005
+    )
+
+
+def test_missing_hours_cost_nothing() -> None:
+    """Hours without a consumption cost nothing, and don't break the running cost."""
+    costs = calculate_hourly_costs(_hourly([599, None, 2]), ELECTRIC_TARIFF)
+
+    assert costs.tolist() == pytest.approx([5.99, 0, 0.09])
+
+
+def test_costs_to_statistics_dataframe_sums_on() -> None:
+    """Cost statistics carry their running sum on from the given initial sum."""
+    costs_df = costs_to_statistics_dataframe(_hourly([1.5, 2.5]), 10.0)
+
+    assert costs_df["state"].tolist() == [1.5, 2.5]
+    assert costs_df["sum"].tolist() == [11.5, 14.0]
+    assert costs_df.index.name == "start"
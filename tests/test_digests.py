@@ -0,0 +1,113 @@
+"""Tests for the per-day digests of imported hourly consumptions."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from usms import BRUNEI_TZ
+
+from custom_components.ha_usms import digests as digests_module
+from custom_components.ha_usms.digests import HAUSMSDayDigests, get_day_digests
+from custom_components.ha_usms.epoch import datetime_to_epoch_day
+
+OCTOBER_1 = datetime(2026, 10, 1, tzinfo=BRUNEI_TZ)
+OCTOBER_2 = datetime(2026, 10, 2, tzinfo=BRUNEI_TZ)
+METER_DATA = SimpleNamespace(statistic_id="sensor.electricity_meter_10000000")
+
+
+def _days(*days: list[float]) -> pd.Series:
+    """Return the hourly consumptions of consecutive days from October 1st."""
+    values = [value for day in days for value in day]
+    return pd.Series(
+        values,
+        index=pd.date_range(OCTOBER_1, periods=len(values), freq="h"),
+        dtype=float,
+    )
+
+
+@pytest.fixture
+def digests(monkeypatch: pytest.MonkeyPatch) -> HAUSMSDayDigests:
+    """Return an empty digest index, saved nowhere."""
+    monkeypatch.setattr(digests_module, "Store", MagicMock())
+    return HAUSMSDayDigests(MagicMock(), SimpleNamespace(entry_id="entry"))
+
+
+def test_digests_are_by_brunei_day() -> None:
+    """Each Brunei day gets a digest, keyed by its epoch day."""
+    day_digests = get_day_digests(_days([1.0] * 24, [2.0] * 24))
+
+    assert list(day_digests) == [
+        datetime_to_epoch_day(OCTOBER_1),
+        datetime_to_epoch_day(OCTOBER_2),
+    ]
+    assert (
+        day_digests[datetime_to_epoch_day(OCTOBER_1)]
+        != day_digests[datetime_to_epoch_day(OCTOBER_2)]
+    )
+
+
+def test_changed_day_gets_a_new_digest() -> None:
+    """Changing a single hour of a day changes only that day's digest."""
+    before = get_day_digests(_days([1.0] * 24, [2.0] * 24))
+    revised = [2.0] * 24
+    revised[13] = 2.5
+
+    after = get_day_digests(_days([1.0] * 24, revised))
+
+    day = datetime_to_epoch_day(OCTOBER_1)
+    assert after[day] == before[day]
+    next_day = datetime_to_epoch_day(OCTOBER_2)
+    assert after[next_day] != before[next_day]
+
+
+def test_digests_ignore_float_noise() -> None:
+    """Consumptions equal to the portal's 3 decimals have the same digest."""
+    assert get_day_digests(_days([0.1 + 0.2] * 24)) == get_day_digests(
+        _days([0.3] * 24)
+    )
+
+
+def test_filling_in_a_day_changes_its_digest() -> None:
+    """A day with hours missing gets a new digest once they are filled in."""
+    partial_day = [1.0] * 12 + [None] * 12
+
+    assert get_day_digests(_days(partial_day)) != get_day_digests(_days([1.0] * 24))
+
+
+def test_filter_changed_keeps_only_changed_days(digests: HAUSMSDayDigests) -> None:
+    """Days imported before are dropped, unless their contents changed."""
+    digests.update(METER_DATA, _days([1.0] * 24, [2.0] * 24))
+    revised = [2.0] * 24
+    revised[0] = 3.0
+
+    changed = digests.filter_changed(METER_DATA, _days([1.0] * 24, revised))
+
+    assert changed.index.min() == OCTOBER_2
+    assert changed.tolist() == revised
+
+
+def test_forgotten_days_are_imported_again(digests: HAUSMSDayDigests) -> None:
+    """A forgotten day counts as changed, even if its contents didn't."""
+    consumptions = _days([1.0] * 24, [2.0] * 24)
+    digests.update(METER_DATA, consumptions)
+
+    digests.forget(METER_DATA, [OCTOBER_1])
+
+    changed = digests.filter_changed(METER_DATA, consumptions)
+    assert changed.tolist() == [1.0] * 24
+    assert digests.as_dict() == {METER_DATA.statistic_id: 1}
+
+
+def test_reset_forgets_every_day(digests: HAUSMSDayDigests) -> None:
+    """After a reset, every day is imported again."""
+    consumptions = _days([1.0] * 24, [2.0] * 24)
+    digests.update(METER_DATA, consumptions)
+
+    digests.reset(METER_DATA)
+
+    assert len(digests.filter_changed(METER_DATA, consumptions)) == 48
+    assert digests.as_dict() == {}
@@ -0,0 +1,82 @@
+"""Tests for the epoch buckets of hours, days and months in Brunei time."""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+import pandas as pd
+from usms import BRUNEI_TZ
+
+from custom_components.ha_usms.epoch import (
+    SECONDS_PER_HOUR,
+    date_to_epoch_day,
+    datetime_to_epoch_day,
+    epoch_day_to_date,
+    epoch_day_to_datetime,
+    hour_to_datetime,
+    hour_to_day_start,
+    to_epoch_days,
+    to_epoch_hours,
+    to_epoch_months,
+    to_hours_of_day,
+)
+
+# midnight in Brunei is still the day before in UTC
+MIDNIGHT = datetime(2026, 11, 1, tzinfo=BRUNEI_TZ)
+MIDNIGHT_UTC = datetime(2026, 10, 31, 16, tzinfo=UTC)
+
+
+def _index(*moments: datetime) -> pd.DatetimeIndex:
+    """Return a DatetimeIndex of the given moments."""
+    return pd.DatetimeIndex(moments)
+
+
+def test_brunei_midnight_starts_a_new_day() -> None:
+    """The Brunei day changes at midnight in UTC+8, not at midnight in UTC."""
+    before = datetime(2026, 10, 31, 23, 59, tzinfo=BRUNEI_TZ)
+    days = to_epoch_days(_index(before, MIDNIGHT))
+
+    assert MIDNIGHT == MIDNIGHT_UTC
+    assert days[1] - days[0] == 1
+    assert epoch_day_to_date(int(days[1])) == date(2026, 11, 1)
+    assert datetime_to_epoch_day(MIDNIGHT_UTC) == days[1]
+
+
+def test_buckets_do_not_depend_on_the_index_timezone() -> None:
+    """The same moments fall in the same buckets, whatever their timezone."""
+    brunei = _index(MIDNIGHT)
+    utc = brunei.tz_convert(UTC)
+
+    assert to_epoch_days(brunei) == to_epoch_days(utc)
+    assert to_hours_of_day(brunei) == to_hours_of_day(utc) == 0
+    assert to_epoch_months(brunei) == to_epoch_months(utc)
+
+
+def test_brunei_midnight_starts_a_new_month() -> None:
+    """The first hour of a Brunei month is in the new month, not the last."""
+    before = datetime(2026, 10, 31, 23, tzinfo=BRUNEI_TZ)
+    months = to_epoch_months(_index(before, MIDNIGHT))
+
+    # months since January 1970
+    assert months.tolist() == [(2026 - 1970) * 12 + 9, (2026 - 1970) * 12 + 10]
+
+
+def test_hours() -> None:
+    """Hours since the epoch convert back to their Brunei start."""
+    hour = int(to_epoch_hours(_index(MIDNIGHT))[0])
+
+    assert hour == MIDNIGHT.timestamp() // SECONDS_PER_HOUR
+    assert hour_to_datetime(hour) == MIDNIGHT
+    assert hour_to_datetime(hour).utcoffset() == MIDNIGHT.utcoffset()
+    assert hour_to_day_start(hour + 23) == hour
+    assert hour_to_day_start(hour - 1) == hour - 24
+
+
+def test_days_and_dates() -> None:
+    """Epoch days convert from and to Brunei dates and midnights."""
+    day = date_to_epoch_day(date(2026, 11, 1))
+
+    assert day == datetime_to_epoch_day(MIDNIGHT)
+    assert epoch_day_to_date(day) == date(2026, 11, 1)
+    assert epoch_day_to_datetime(day) == MIDNIGHT
+    assert date_to_epoch_day(date(1970, 1, 1)) == 0
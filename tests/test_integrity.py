@@ -0,0 +1,132 @@
+"""Tests for the checks of damaged statistics."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+from usms import BRUNEI_TZ
+
+from custom_components.ha_usms.integrity import (
+    DAMAGE_DUPLICATE,
+    DAMAGE_KINDS,
+    DAMAGE_MISALIGNED,
+    DAMAGE_MISSING,
+    DAMAGE_STATE,
+    DAMAGE_SUM,
+    find_damaged_hours,
+    to_damaged_ranges,
+)
+
+START = datetime(2026, 10, 1, tzinfo=BRUNEI_TZ)
+
+
+def _statistics(
+    states: list[float],
+    initial_sum: float = 0.0,
+    starts: list[datetime] | None = None,
+) -> pd.DataFrame:
+    """Return hourly statistics from START, with correct running sums."""
+    index = pd.DatetimeIndex(
+        starts or [START + timedelta(hours=hour) for hour in range(len(states))],
+        name="start",
+    )
+    statistics_df = pd.DataFrame({"state": states}, index=index, dtype=float)
+    statistics_df["sum"] = statistics_df["state"].cumsum() + initial_sum
+    return statistics_df
+
+
+def _damage(damaged: pd.DataFrame) -> list[list[str]]:
+    """Return the kinds of damage of each damaged hour."""
+    return [
+        [kind for kind in DAMAGE_KINDS if row[kind]] for _, row in damaged.iterrows()
+    ]
+
+
+def test_intact_statistics() -> None:
+    """Statistics summed up correctly, without gaps, have no damage."""
+    damaged = find_damaged_hours(_statistics([1, 2, 3]), None, None)
+
+    assert damaged.empty
+    assert to_damaged_ranges(damaged) == []
+
+
+def test_carries_on_from_the_previous_hour() -> None:
+    """A window carries on from the sum of the hour before it."""
+    statistics_df = _statistics([1, 2], initial_sum=10.0)
+    previous_start = START - timedelta(hours=1)
+
+    assert find_damaged_hours(statistics_df, previous_start, 10.0).empty
+    # the hour before was rewritten since, like by filling in a gap before it
+    damaged = find_damaged_hours(statistics_df, previous_start, 7.0)
+    assert _damage(damaged) == [[DAMAGE_SUM]]
+
+
+def test_broken_sum() -> None:
+    """An hour whose sum isn't the previous sum plus its state is damaged."""
+    statistics_df = _statistics([1, 2, 3])
+    statistics_df.loc[statistics_df.index[1], "sum"] += 5
+
+    damaged = find_damaged_hours(statistics_df, None, None)
+
+    # the hour after is summed on from the broken one
+    assert _damage(damaged) == [[DAMAGE_SUM], [DAMAGE_SUM]]
+
+
+def test_missing_hours() -> None:
+    """A gap is repaired from the first missing hour on."""
+    starts = [START, START + timedelta(hours=3)]
+
+    damaged = find_damaged_hours(_statistics([1, 2], starts=starts), None, None)
+
+    assert _damage(damaged) == [[DAMAGE_MISSING]]
+    assert to_damaged_ranges(damaged) == [
+        {
+            "start": START + timedelta(hours=1),
+            "end": START + timedelta(hours=4),
+            "damage": [DAMAGE_MISSING],
+        }
+    ]
+
+
+def test_duplicate_and_misaligned_hours() -> None:
+    """Hours not on the hour, or recorded twice, are damaged."""
+    starts = [START, START + timedelta(hours=1, minutes=30), START + timedelta(hours=2)]
+    misaligned = find_damaged_hours(_statistics([1, 2, 3], starts=starts), None, None)
+    starts = [START, START + timedelta(hours=1), START + timedelta(hours=1)]
+    duplicate = find_damaged_hours(_statistics([1, 2, 2], starts=starts), None, None)
+
+    assert DAMAGE_MISALIGNED in _damage(misaligned)[0]
+    assert all(DAMAGE_DUPLICATE in damage for damage in _damage(duplicate))
+
+
+def test_state_disagreeing_with_the_portal() -> None:
+    """An hour whose state isn't the portal's consumption is damaged."""
+    statistics_df = _statistics([1, 2, 3])
+    consumptions = pd.Series([1.0, 2.5], index=statistics_df.index[:2])
+
+    damaged = find_damaged_hours(statistics_df, None, None, consumptions)
+
+    assert list(damaged.index) == [statistics_df.index[1]]
+    assert _damage(damaged) == [[DAMAGE_STATE]]
+
+
+def test_damaged_ranges_merge_adjacent_hours() -> None:
+    """Damaged hours next to each other make up a single range."""
+    statistics_df = _statistics([1, 2, 3, 4, 5])
+    consumptions = pd.Series([9.0, 9.0, 3.0, 9.0], index=statistics_df.index[:4])
+
+    damaged = find_damaged_hours(statistics_df, None, None, consumptions)
+
+    assert to_damaged_ranges(damaged) == [
+        {
+            "start": START,
+            "end": START + timedelta(hours=2),
+            "damage": [DAMAGE_STATE],
+        },
+        {
+            "start": START + timedelta(hours=3),
+            "end": START + timedelta(hours=4),
+            "damage": [DAMAGE_STATE],
+        },
+    ]
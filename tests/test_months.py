@@ -0,0 +1,135 @@
+"""Tests for the daily consumptions kept of recent months."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from usms import BRUNEI_TZ
+
+from custom_components.ha_usms import months as months_module
+from custom_components.ha_usms.months import (
+    HAUSMSMonthTotals,
+    get_day_end,
+    get_days_to_check,
+    get_final_days,
+    get_last_month,
+)
+
+OCTOBER = date(2026, 10, 1)
+# the month rolls over at midnight in Brunei, and its final days may be revised
+# until 2 days later
+MONTH_END = datetime(2026, 11, 1, tzinfo=BRUNEI_TZ).timestamp()
+REVISION_END = datetime(2026, 11, 3, tzinfo=BRUNEI_TZ).timestamp()
+METER_DATA = SimpleNamespace(no="10000000")
+
+
+def _checked(days: range | list[int], when: float) -> dict[int, float]:
+    """Return the given days as last checked at the same time."""
+    return dict.fromkeys(days, when)
+
+
+@pytest.fixture
+def months(monkeypatch: pytest.MonkeyPatch) -> HAUSMSMonthTotals:
+    """Return empty months, saved nowhere."""
+    monkeypatch.setattr(months_module, "Store", MagicMock())
+    return HAUSMSMonthTotals(MagicMock(), SimpleNamespace(entry_id="entry"))
+
+
+def _set_now(monkeypatch: pytest.MonkeyPatch, when: float) -> None:
+    """Make the current time the given seconds since the epoch."""
+    monkeypatch.setattr(months_module.time, "time", lambda: when)
+
+
+def test_month_dates() -> None:
+    """Months and days end at midnight in Brunei."""
+    assert get_last_month(date(2026, 1, 1)) == date(2025, 12, 1)
+    assert get_final_days(date(2026, 2, 1)) == [27, 28]
+    assert get_day_end(OCTOBER, 31) == MONTH_END
+
+
+def test_unchecked_month_needs_every_day() -> None:
+    """A month never seen needs all of its days fetched."""
+    assert get_days_to_check(OCTOBER, {}, MONTH_END) == list(range(1, 32))
+
+
+def test_days_checked_before_they_ended() -> None:
+    """Only the days last seen before they ended need fetching again."""
+    # each day was last seen just after it ended, but the 14th just before, and
+    # the final days after the month rolled over
+    checked = {day: get_day_end(OCTOBER, day) + 60 for day in range(1, 30)}
+    checked[14] = get_day_end(OCTOBER, 14) - 1
+    checked.update(_checked([30, 31], MONTH_END + 60))
+
+    assert get_days_to_check(OCTOBER, checked, MONTH_END + 3600) == [14]
+
+
+def test_final_days_after_the_rollover() -> None:
+    """The final days need fetching once the month has rolled over."""
+    checked = _checked(range(1, 32), MONTH_END - 60)
+
+    assert get_days_to_check(OCTOBER, checked, MONTH_END) == [30, 31]
+
+
+def test_final_days_within_the_revision_window() -> None:
+    """Once fetched after the rollover, the final days wait out their revisions."""
+    checked = _checked(range(1, 32), MONTH_END + 60)
+
+    assert get_days_to_check(OCTOBER, checked, MONTH_END + 3600) == []
+    assert get_days_to_check(OCTOBER, checked, REVISION_END - 1) == []
+
+
+def test_final_days_after_the_revision_window() -> None:
+    """The final days need fetching once more after their revision window only."""
+    checked = _checked(range(1, 32), MONTH_END + 60)
+
+    assert get_days_to_check(OCTOBER, checked, REVISION_END) == [30, 31]
+
+    checked.update(_checked([30, 31], REVISION_END + 60))
+    assert get_days_to_check(OCTOBER, checked, REVISION_END + 86400) == []
+
+
+def test_update_keeps_consumptions_by_day(
+    months: HAUSMSMonthTotals, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Daily consumptions are kept by day of month, skipping missing ones."""
+    _set_now(monkeypatch, MONTH_END + 60)
+    consumptions = pd.Series(
+        [1.0, None, 3.0],
+        index=pd.date_range(datetime(2026, 10, 1, tzinfo=BRUNEI_TZ), periods=3),
+    )
+
+    months.update(METER_DATA, OCTOBER, consumptions, range(1, 4))
+
+    assert months.get(METER_DATA, OCTOBER).to_dict() == {1: 1.0, 3: 3.0}
+    # the day the portal had nothing for was still checked
+    assert months.get_days_to_check(METER_DATA, OCTOBER, MONTH_END + 120) == list(
+        range(4, 32)
+    )
+
+
+def test_update_single_day(
+    months: HAUSMSMonthTotals, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A day fetched on its own is kept alongside the rest of its month."""
+    _set_now(monkeypatch, MONTH_END + 60)
+    months.update(METER_DATA, OCTOBER, pd.Series({1: 1.0, 2: 2.0}), [1, 2])
+
+    months.update(METER_DATA, OCTOBER, pd.Series({2: 2.5}), [2])
+
+    assert months.get(METER_DATA, OCTOBER).to_dict() == {1: 1.0, 2: 2.5}
+
+
+def test_only_recent_months_are_kept(
+    months: HAUSMSMonthTotals, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Updating a new month drops the oldest one."""
+    _set_now(monkeypatch, MONTH_END + 60)
+    for month in (date(2026, 9, 1), OCTOBER, date(2026, 11, 1)):
+        months.update(METER_DATA, month, pd.Series({1: 1.0}), [1])
+
+    assert months.get(METER_DATA, date(2026, 9, 1)).empty
+    assert months.get(METER_DATA, OCTOBER).to_dict() == {1: 1.0}